@@ -7,7 +7,7 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Header, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import uvicorn
 import yaml
 
@@ -243,20 +243,24 @@ async def batch_compute_ai_functions(
         if function_name not in function_map[dataset]:
             raise HTTPException(status_code=400, detail=f"Invalid function: {function_name}")
 
-        processor = BatchProcessor()
+        batch_cfg = config.get('batch_processing', {})
+        processor = BatchProcessor(
+            max_workers=batch_cfg.get('max_workers', 4),
+            batch_size=batch_cfg.get('batch_size', 1000)
+        )
         compute_func = function_map[dataset][function_name]
 
         # Get IDs to process
         ids = None
         if max_items:
             db = get_db()
-            config = get_dataset_config(dataset)
-            key_field = config.key_field
-            query = f"SELECT {key_field} FROM {config.table} LIMIT ?"
+            dataset_cfg = get_dataset_config(dataset)
+            key_field = dataset_cfg.key_field
+            query = f"SELECT {key_field} FROM {dataset_cfg.table} LIMIT ?"
             rows = db.fetchall(query, (max_items,))
             ids = [row[0] for row in rows]
 
-        result = processor.batch_compute_ai_function(
+        result = await processor.batch_compute_ai_function(
             dataset=dataset,
             function_name=function_name,
             compute_func=compute_func,
@@ -286,6 +290,27 @@ async def get_batch_status(dataset: str):
         logger.error(f"Error getting batch status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/admin/export/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: str = "jsonl",
+    include_ai_results: bool = True,
+):
+    """Stream a dataset export as JSON Lines or CSV."""
+    try:
+        chunks = BatchProcessor().stream_export(
+            dataset, output_format=format, include_ai_results=include_ai_results
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Starlette iterates the synchronous generator in its threadpool, off the event loop
+    return StreamingResponse(
+        chunks,
+        media_type="text/csv" if format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{dataset}_export.{format}"'},
+    )
+
 # Exception handlers
 @app.exception_handler(404)
 async def not_found_handler(request: Request, exc: HTTPException):
@@ -84,7 +84,7 @@ class BaseDAO:
         rows = self.db.fetchall(query, (limit, offset))
         return [self._row_to_item(row) for row in rows], total
 
-    def get_details(self, id_value: str) -> Optional[Dict[str, Any]]:
+    async def get_details(self, id_value: str) -> Optional[Dict[str, Any]]:
         """Get full details for an item including AI results."""
         query = f"""
             SELECT {self.key_field}, title, category, risk_theme, risk_subtheme, raw_data
@@ -98,7 +98,7 @@ class BaseDAO:
 
         record = json.loads(row[5]) if row[5] else {}
 
-        ai_results = self.resolver.get_all_results(self.dataset_name, id_value)
+        ai_results = await self.resolver.get_all_results(self.dataset_name, id_value)
         ai_payloads: Dict[str, Any] = {}
         for func in self.config.ai_functions:
             result = ai_results.get(func)
@@ -9,8 +9,8 @@ class ControlsDAO(BaseDAO):
     def __init__(self):
         super().__init__(dataset_name="controls")
 
-    def get_details(self, control_id: str) -> Optional[Dict[str, Any]]:
-        return super().get_details(control_id)
+    async def get_details(self, control_id: str) -> Optional[Dict[str, Any]]:
+        return await super().get_details(control_id)
 
     async def trigger_controls_taxonomy(
         self,
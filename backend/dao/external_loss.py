@@ -9,8 +9,8 @@ class ExternalLossDAO(BaseDAO):
     def __init__(self):
         super().__init__(dataset_name="external_loss")
 
-    def get_details(self, reference_id_code: str) -> Optional[Dict[str, Any]]:
-        return super().get_details(reference_id_code)
+    async def get_details(self, reference_id_code: str) -> Optional[Dict[str, Any]]:
+        return await super().get_details(reference_id_code)
 
     async def trigger_issue_taxonomy(
         self,
@@ -9,8 +9,8 @@ class InternalLossDAO(BaseDAO):
     def __init__(self):
         super().__init__(dataset_name="internal_loss")
 
-    def get_details(self, event_id: str) -> Optional[Dict[str, Any]]:
-        return super().get_details(event_id)
+    async def get_details(self, event_id: str) -> Optional[Dict[str, Any]]:
+        return await super().get_details(event_id)
 
     async def trigger_issue_taxonomy(
         self,
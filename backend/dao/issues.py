@@ -9,8 +9,8 @@ class IssuesDAO(BaseDAO):
     def __init__(self):
         super().__init__(dataset_name="issues")
 
-    def get_details(self, issue_id: str) -> Optional[Dict[str, Any]]:
-        return super().get_details(issue_id)
+    async def get_details(self, issue_id: str) -> Optional[Dict[str, Any]]:
+        return await super().get_details(issue_id)
 
     async def trigger_issue_taxonomy(
         self,
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Dict, List, Optional
 
 
@@ -69,6 +70,7 @@ DATASET_CONFIG: Dict[str, DatasetConfig] = {
 }
 
 
+@lru_cache(maxsize=16)
 def get_dataset_config(dataset: str) -> DatasetConfig:
     """Fetch configuration for a dataset or raise ValueError."""
     try:
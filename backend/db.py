@@ -6,14 +6,22 @@ import json
 import logging
 import os
 import threading
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import time
+import weakref
+import zlib
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
 
 import apsw
 import yaml
 
 from dataset_config import DATASET_CONFIG
 
+try:
+    import orjson  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,6 +39,61 @@ def _load_db_config() -> Dict[str, Any]:
 
 _DB_CONFIG: Dict[str, Any] = _load_db_config()
 
+# Keep IN (...) lists under SQLite's historical 999 bound-parameter limit
+SQL_PARAM_CHUNK = 900
+
+# Connection settings for bulk writes to derived (recomputable) data. The journal and
+# sync settings match the defaults applied at open, in case config.yaml overrides them;
+# the larger page cache and memory map are only worth holding during bulk jobs.
+BULK_LOAD_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -262144,  # 256MB
+    "mmap_size": 1073741824,  # 1GB
+}
+
+# Memoized compute-function outputs keyed on a digest of (function, input record)
+COMPUTE_CACHE_TABLE = "ai_compute_cache"
+# Oldest memo rows beyond this count are evicted after each batch compute
+COMPUTE_CACHE_MAX_ROWS = 100_000
+
+# Leading byte marking a zlib-compressed JSON payload blob (format version 1)
+_PAYLOAD_ZLIB_PREFIX = b"\x01"
+
+
+if orjson is not None:
+
+    def json_dumps(value: Any) -> str:
+        """Serialize ``value`` to a JSON string (orjson-backed)."""
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+    json_loads = orjson.loads
+else:
+
+    def json_dumps(value: Any) -> str:
+        """Serialize ``value`` to a JSON string."""
+        return json.dumps(value)
+
+    json_loads = json.loads
+
+
+def chunked(values: Sequence[Any], size: int = SQL_PARAM_CHUNK) -> Iterator[Sequence[Any]]:
+    """Yield consecutive slices of ``values`` with at most ``size`` items."""
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def in_clause(prefix: str, count: int) -> str:
+    """Close an ``... IN (`` statement prefix with ``count`` placeholders."""
+    return prefix + ",".join("?" * count) + ")"
+
+
+def utc_now_iso() -> str:
+    """Return the current UTC time as ISO-8601 with microseconds and a ``Z`` suffix."""
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) + f".{nanos // 1000:06d}Z"
+
 
 class _PGCursorResult:
     """Minimal cursor-like wrapper for asyncpg execute results."""
@@ -61,7 +124,20 @@ class Database:
         self._loop_thread: Optional[threading.Thread] = None
         self._pg_pool: Any = None
 
-        self._lock = threading.Lock()
+        # Re-entrant so a transaction() can hold it across execute() calls
+        self._lock = threading.RLock()
+
+        # Pragma values to restore once the last overlapping scoped_pragmas() block exits
+        self._pragma_scopes = 0
+        self._pragma_snapshot: Dict[str, Any] = {}
+
+        # Weak references to ``listener(table, keys)`` callbacks told about bulk writes
+        self._invalidation_listeners: List[weakref.ref] = []
+
+        # Optional compression of AI payloads (SQLite only; PostgreSQL columns are TEXT)
+        self._compress_payloads = False
+        self._compress_level = int(self._db_cfg.get("payload_compression_level", 3))
+
         self.init_db()
 
     # ------------------------------------------------------------------ init
@@ -160,24 +236,28 @@ class Database:
 
     def _init_sqlite(self) -> None:
         """Initialize SQLite (APSW) connection."""
-        self.connection = apsw.Connection(self.db_path)
+        # Batch jobs reuse a handful of statements per table; keep them all prepared
+        self.connection = apsw.Connection(
+            self.db_path,
+            statementcachesize=int(self._db_cfg.get("statement_cache_size", 256)),
+        )
+        self.connection.setbusytimeout(int(self._db_cfg.get("busy_timeout_ms", 5000)))
         self.backend = "sqlite"
 
         # Set SQLite pragmas for performance
         pragmas_cfg: Dict[str, Any] = self._db_cfg.get("pragmas", {})
-        pragmas = [
-            f"PRAGMA journal_mode={pragmas_cfg.get('journal_mode', 'WAL')};",
-            f"PRAGMA synchronous={pragmas_cfg.get('synchronous', 'NORMAL')};",
-            f"PRAGMA temp_store={pragmas_cfg.get('temp_store', 'MEMORY')};",
-            f"PRAGMA mmap_size={int(pragmas_cfg.get('mmap_size', 268435456))};",
-            f"PRAGMA cache_size={int(pragmas_cfg.get('cache_size', -200000))};",
-        ]
-
-        cursor = self.connection.cursor()
-        for pragma in pragmas:
-            cursor.execute(pragma)
+        self.apply_pragmas(
+            {
+                "journal_mode": pragmas_cfg.get("journal_mode", "WAL"),
+                "synchronous": pragmas_cfg.get("synchronous", "NORMAL"),
+                "temp_store": pragmas_cfg.get("temp_store", "MEMORY"),
+                "mmap_size": int(pragmas_cfg.get("mmap_size", 268435456)),
+                "cache_size": int(pragmas_cfg.get("cache_size", -200000)),
+            }
+        )
 
         self._create_tables_sqlite()
+        self._compress_payloads = bool(self._db_cfg.get("payload_compression", False))
         logger.info("Connected to SQLite database at %s", self.db_path)
 
     # ------------------------------------------------------------------ schema
@@ -255,6 +335,36 @@ class Database:
                     """
                 )
 
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {COMPUTE_CACHE_TABLE} (
+                input_hash TEXT PRIMARY KEY,
+                function_name TEXT NOT NULL,
+                result_table TEXT,
+                key_value TEXT,
+                payload JSON,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        # Tables created before memo rows recorded the result row they were stored for
+        columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({COMPUTE_CACHE_TABLE})")}
+        for column in ("result_table", "key_value"):
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE {COMPUTE_CACHE_TABLE} ADD COLUMN {column} TEXT")
+        cursor.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_{COMPUTE_CACHE_TABLE}_row
+            ON {COMPUTE_CACHE_TABLE}(result_table, key_value)
+            """
+        )
+        cursor.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_{COMPUTE_CACHE_TABLE}_created_at
+            ON {COMPUTE_CACHE_TABLE}(created_at)
+            """
+        )
+
         # APSW is in autocommit mode by default, no commit needed
 
     async def _create_tables_postgres(self, conn: Any) -> None:
@@ -308,11 +418,41 @@ class Database:
                     """
                 )
 
+        await conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {COMPUTE_CACHE_TABLE} (
+                input_hash TEXT PRIMARY KEY,
+                function_name TEXT NOT NULL,
+                result_table TEXT,
+                key_value TEXT,
+                payload TEXT,
+                created_at TEXT
+            )
+            """
+        )
+        # Tables created before memo rows recorded the result row they were stored for
+        for column in ("result_table", "key_value"):
+            await conn.execute(f"ALTER TABLE {COMPUTE_CACHE_TABLE} ADD COLUMN IF NOT EXISTS {column} TEXT")
+        await conn.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_{COMPUTE_CACHE_TABLE}_row
+            ON {COMPUTE_CACHE_TABLE}(result_table, key_value)
+            """
+        )
+        await conn.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_{COMPUTE_CACHE_TABLE}_created_at
+            ON {COMPUTE_CACHE_TABLE}(created_at)
+            """
+        )
+
         logger.info("Ensured PostgreSQL tables exist in schema 'analytics'")
 
     # ------------------------------------------------------------------ helpers
     def _get_key_field_for_table(self, table: str) -> Optional[str]:
         """Infer the primary key field for a given table name."""
+        if table == COMPUTE_CACHE_TABLE:
+            return "input_hash"
         for dataset, config in DATASET_CONFIG.items():
             if config.table == table or table.startswith(f"{dataset}_"):
                 return config.key_field
@@ -463,6 +603,22 @@ class Database:
         return self._pg_run(_fetchall())
 
     # ------------------------------------------------------------------ public API
+    def encode_payload(self, payload: Any) -> Any:
+        """Serialize an AI payload for storage, compressing it when enabled."""
+        text = json_dumps(payload)
+        if self._compress_payloads:
+            return _PAYLOAD_ZLIB_PREFIX + zlib.compress(text.encode("utf-8"), self._compress_level)
+        return text
+
+    @staticmethod
+    def decode_payload(value: Any) -> Any:
+        """Deserialize a stored AI payload written as plain JSON or a compressed blob."""
+        if isinstance(value, (bytes, memoryview)):
+            value = bytes(value)
+            if value[:1] == _PAYLOAD_ZLIB_PREFIX:
+                return json_loads(zlib.decompress(value[1:]))
+        return json_loads(value)
+
     def get_connection(self):
         """Get underlying database connection."""
         return self.connection
@@ -482,6 +638,101 @@ class Database:
             cursor.execute(query, params)
             return cursor
 
+    def execute_count(self, query: str, params: tuple = ()) -> int:
+        """Execute a data-modifying statement and return the number of affected rows."""
+        if self.backend == "postgres":
+            return self.execute(query, params).rowcount
+
+        with self._lock:
+            self.execute(query, params)
+            return self.connection.changes()
+
+    def apply_pragmas(self, pragmas: Dict[str, Any]) -> None:
+        """Set SQLite connection pragmas; a no-op on PostgreSQL."""
+        if self.backend == "postgres":
+            return
+        if self.connection is None:
+            raise RuntimeError("SQLite connection is not initialized")
+
+        with self._lock:
+            cursor = self.connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value};")
+
+    @contextmanager
+    def scoped_pragmas(self, pragmas: Dict[str, Any]) -> Iterator[None]:
+        """Apply SQLite pragmas for the enclosed bulk job, then restore the previous values.
+
+        The connection is shared, so overlapping scopes share one snapshot: the values in
+        force before the first scope are restored when the last one exits. A no-op on
+        PostgreSQL or when ``pragmas`` is empty.
+        """
+        if self.backend == "postgres" or not pragmas:
+            yield
+            return
+        if self.connection is None:
+            raise RuntimeError("SQLite connection is not initialized")
+
+        with self._lock:
+            cursor = self.connection.cursor()
+            for name in pragmas:
+                if name not in self._pragma_snapshot:
+                    self._pragma_snapshot[name] = cursor.execute(f"PRAGMA {name};").fetchone()[0]
+            self._pragma_scopes += 1
+            self.apply_pragmas(pragmas)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pragma_scopes -= 1
+                if not self._pragma_scopes:
+                    snapshot, self._pragma_snapshot = self._pragma_snapshot, {}
+                    self.apply_pragmas(snapshot)
+
+    def add_invalidation_listener(self, listener: Callable[[str, Sequence[Any]], None]) -> None:
+        """Register ``listener(table, keys)`` to hear about rows changed by bulk writers.
+
+        Only a weak reference is kept, so a discarded listener stops being called.
+        """
+        if hasattr(listener, "__self__"):
+            self._invalidation_listeners.append(weakref.WeakMethod(listener))  # type: ignore[arg-type]
+        else:
+            self._invalidation_listeners.append(weakref.ref(listener))
+
+    def invalidate(self, table: str, keys: Sequence[Any]) -> None:
+        """Tell registered listeners that the rows of ``table`` with these keys changed."""
+        if not keys:
+            return
+        alive = []
+        for ref in self._invalidation_listeners:
+            listener = ref()
+            if listener is None:
+                continue
+            alive.append(ref)
+            try:
+                listener(table, keys)
+            except Exception as exc:  # pragma: no cover - logging side-effect
+                logger.warning("Invalidation listener failed for %s: %s", table, exc)
+        self._invalidation_listeners = alive
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Run the enclosed statements in a single SQLite transaction.
+
+        Nested use becomes a savepoint. The connection lock is held throughout so
+        statements from other threads cannot interleave. PostgreSQL statements run on
+        pooled connections, so this is a no-op for that backend.
+        """
+        if self.backend == "postgres":
+            yield
+            return
+
+        if self.connection is None:
+            raise RuntimeError("SQLite connection is not initialized")
+
+        with self._lock, self.connection:
+            yield
+
     def executemany(self, query: str, params_list: List[tuple]):
         """Execute a query with multiple parameter sets."""
         if self.backend == "postgres":
@@ -541,7 +792,7 @@ class Database:
     ) -> bool:
         """Insert or update a JSON payload in an AI function table."""
         if created_at is None:
-            created_at = datetime.utcnow().isoformat() + "Z"
+            created_at = utc_now_iso()
 
         query = f"""
             INSERT OR REPLACE INTO {table} ({key_field}, payload, created_at)
@@ -549,7 +800,8 @@ class Database:
         """
 
         try:
-            self.execute(query, (key_value, json.dumps(payload), created_at))
+            self.execute(query, (key_value, self.encode_payload(payload), created_at))
+            self.invalidate(table, (key_value,))
             return True
         except Exception as e:  # pragma: no cover - logging side-effect
             logger.error("Error inserting JSON into %s: %s", table, e)
@@ -566,7 +818,7 @@ class Database:
         if result:
             payload, created_at = result
             return {
-                "payload": json.loads(payload),
+                "payload": self.decode_payload(payload),
                 "created_at": created_at,
             }
         return None
@@ -51,7 +51,7 @@ async def list_controls(
 async def get_control_details(control_id: str):
     """Get full control details including AI results."""
     try:
-        details = dao.get_details(control_id)
+        details = await dao.get_details(control_id)
         if not details:
             raise HTTPException(status_code=404, detail=f"Control {control_id} not found")
         return details
@@ -51,7 +51,7 @@ async def list_external_losses(
 async def get_external_loss_details(reference_id_code: str):
     """Get full external loss details including AI results."""
     try:
-        details = dao.get_details(reference_id_code)
+        details = await dao.get_details(reference_id_code)
         if not details:
             raise HTTPException(status_code=404, detail=f"External loss {reference_id_code} not found")
         return details
@@ -51,7 +51,7 @@ async def list_internal_losses(
 async def get_internal_loss_details(event_id: str):
     """Get full internal loss details including AI results."""
     try:
-        details = dao.get_details(event_id)
+        details = await dao.get_details(event_id)
         if not details:
             raise HTTPException(status_code=404, detail=f"Internal loss {event_id} not found")
         return details
@@ -51,7 +51,7 @@ async def list_issues(
 async def get_issue_details(issue_id: str):
     """Get full issue details including AI results."""
     try:
-        details = dao.get_details(issue_id)
+        details = await dao.get_details(issue_id)
         if not details:
             raise HTTPException(status_code=404, detail=f"Issue {issue_id} not found")
         return details
@@ -1,25 +1,172 @@
 """Resolver utility for cache-or-compute pattern."""
+import asyncio
 import inspect
-import json
 import logging
-from datetime import datetime
-from typing import Any, Dict, Optional, Tuple
-
-from dataset_config import get_dataset_config
-from db import get_db
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import partial
+from operator import itemgetter
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from dataset_config import DatasetConfig, get_dataset_config
+from db import COMPUTE_CACHE_TABLE, chunked, get_db, in_clause, json_loads, utc_now_iso
 from services import mock_ai
 from services.llm_client import create_mock_llm_client
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on decoded cache rows kept in memory per resolver
+_RESULT_CACHE_SIZE = 4096
+# Bounds how long writes from other processes (CLI recomputes, ingest) stay invisible
+_RESULT_TTL_SECONDS = 30.0
+# Upper bound on per-(session, user) LLM clients kept alive per resolver
+_LLM_CLIENT_CACHE_SIZE = 512
+# Negative cache for IDs absent from their raw table
+_MISSING_CACHE_SIZE = 4096
+_MISSING_TTL_SECONDS = 60.0
+
+
+def _retrieve_exception(task: "asyncio.Future[Any]") -> None:
+    """Mark a shared task's exception retrieved; callers awaiting it re-raise it themselves."""
+    if not task.cancelled():
+        task.exception()
+
+
+def _raw_record_builder(
+    config: DatasetConfig,
+) -> Callable[[str, Tuple[Any, ...]], Dict[str, Any]]:
+    """Return a builder for compute-function records with the dataset's optional fields resolved.
+
+    The builder takes an ID and a ``(raw_data, title, category, risk_theme, risk_subtheme)``
+    row. Which columns feed the fallback record is fixed per dataset, so it is decided here
+    once rather than on every call.
+    """
+    names = [config.key_field, config.title_field, config.theme_field]
+    columns = [1, 3]
+    if config.category_field:
+        names.append(config.category_field)
+        columns.append(2)
+    if config.subtheme_field:
+        names.append(config.subtheme_field)
+        columns.append(4)
+
+    field_names = tuple(names)
+    pick = itemgetter(*columns)
+    loads = json_loads
+
+    def build(id_value: str, row: Tuple[Any, ...]) -> Dict[str, Any]:
+        if row[0]:
+            return loads(row[0])
+        return dict(zip(field_names, (id_value, *pick(row))))
+
+    return build
+
+
+@dataclass(frozen=True, slots=True)
+class _DatasetContext:
+    """Per-dataset SQL and record builder the resolver needs on every request."""
+
+    key_field: str
+    table: str
+    raw_select_sql: str
+    raw_select_in: str
+    build_raw_record: Callable[[str, Tuple[Any, ...]], Dict[str, Any]]
+
+    @classmethod
+    def from_config(cls, config: DatasetConfig) -> "_DatasetContext":
+        """Snapshot a dataset configuration."""
+        return cls(
+            key_field=config.key_field,
+            table=config.table,
+            raw_select_sql=f"""
+                SELECT raw_data, title, category, risk_theme, risk_subtheme
+                FROM {config.table}
+                WHERE {config.key_field} = ?
+            """,
+            raw_select_in=(
+                f"SELECT {config.key_field}, raw_data, title, category, risk_theme, risk_subtheme "
+                f"FROM {config.table} WHERE {config.key_field} IN ("
+            ),
+            build_raw_record=_raw_record_builder(config),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class _TableStatements:
+    """SQL for one ``{dataset}_{func}`` cache table, built once per resolver."""
+
+    table: str
+    select: str
+    select_tagged: str
+    select_in: str
+    upsert: str
+    delete_one: str
+    delete_all: str
+    delete_memo_one: str
+    delete_memo_all: str
+
+    @classmethod
+    def for_table(cls, table: str, key_field: str) -> "_TableStatements":
+        """Render the statements for a cache table keyed on ``key_field``."""
+        return cls(
+            table=table,
+            select=f"SELECT payload, created_at FROM {table} WHERE {key_field} = ?",
+            select_tagged=(
+                f"SELECT '{table}' AS source, payload, created_at FROM {table} WHERE {key_field} = ?"
+            ),
+            select_in=f"SELECT {key_field}, payload, created_at FROM {table} WHERE {key_field} IN (",
+            upsert=f"INSERT OR REPLACE INTO {table} ({key_field}, payload, created_at) VALUES (?, ?, ?)",
+            delete_one=f"DELETE FROM {table} WHERE {key_field} = ?",
+            delete_all=f"DELETE FROM {table}",
+            delete_memo_one=(
+                f"DELETE FROM {COMPUTE_CACHE_TABLE} WHERE result_table = '{table}' AND key_value = ?"
+            ),
+            delete_memo_all=f"DELETE FROM {COMPUTE_CACHE_TABLE} WHERE result_table = '{table}'",
+        )
+
 
 class FunctionResolver:
     """Resolve function results using cache-or-compute pattern."""
 
+    __slots__ = (
+        "db",
+        "function_map",
+        "_llm_client_factory",
+        "_llm_clients",
+        "_llm_client_cache_size",
+        "_lru",
+        "_inflight",
+        "_missing",
+        "_cache_lock",
+        "_cfg",
+        "_fn",
+        "_sql",
+        "_valid_datasets",
+        "_valid_pairs",
+        "_needs_llm",
+        "_async_fn",
+        "_sync_fn",
+        "_result_tables",
+        "_raw_tables",
+        "__weakref__",
+    )
+
     def __init__(self, llm_client_factory=None):
         self.db = get_db()
         self._llm_client_factory = llm_client_factory or create_mock_llm_client
-        self._llm_clients: Dict[Tuple[str, str], Any] = {}
+        # LLM clients keyed on (session, user), most recently used last
+        self._llm_clients: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._llm_client_cache_size = _LLM_CLIENT_CACHE_SIZE
+        # (monotonic time stored, decoded cache row) keyed on (table, id), most recently used last
+        self._lru: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # Pending computations keyed on (table, id) so concurrent misses share one call
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        # (dataset, id) pairs recently found missing, with the monotonic time of the miss
+        self._missing: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        # Guards _lru and _missing, which bulk writers invalidate from worker threads
+        self._cache_lock = threading.Lock()
 
         # Map dataset and function names to mock AI functions
         self.function_map: Dict[str, Dict[str, Any]] = {
@@ -48,53 +195,229 @@ class FunctionResolver:
                 "slow_enrichment": mock_ai.get_delayed_enrichment,
             },
         }
+        self._build_dispatch_tables()
+        self.db.add_invalidation_listener(self._on_rows_changed)
 
     # ------------------------------------------------------------------ helpers
-    def _get_cached_result(
+    def _build_dispatch_tables(self) -> None:
+        """Precompute per-dataset and per-function metadata from ``function_map``."""
+        self._cfg: Dict[str, _DatasetContext] = {
+            dataset: _DatasetContext.from_config(get_dataset_config(dataset))
+            for dataset in self.function_map
+        }
+        self._fn: Dict[Tuple[str, str], Callable[..., Any]] = {
+            (dataset, func): fn
+            for dataset, functions in self.function_map.items()
+            for func, fn in functions.items()
+        }
+        self._sql: Dict[Tuple[str, str], _TableStatements] = {
+            (dataset, func): _TableStatements.for_table(
+                f"{dataset}_{func}", self._cfg[dataset].key_field
+            )
+            for dataset, func in self._fn
+        }
+        self._valid_datasets: FrozenSet[str] = frozenset(self.function_map)
+        self._valid_pairs: FrozenSet[Tuple[str, str]] = frozenset(self._fn)
+        self._needs_llm: Set[Callable[..., Any]] = {
+            fn
+            for functions in self.function_map.values()
+            for fn in functions.values()
+            if "llm_client" in inspect.signature(fn).parameters
+        }
+        # Bucket by calling convention once so computing never probes the return value
+        self._async_fn: Dict[Tuple[str, str], Callable[..., Any]] = {
+            key: fn for key, fn in self._fn.items() if inspect.iscoroutinefunction(fn)
+        }
+        self._sync_fn: Dict[Tuple[str, str], Callable[..., Any]] = {
+            key: fn for key, fn in self._fn.items() if key not in self._async_fn
+        }
+        self._result_tables: FrozenSet[str] = frozenset(stmts.table for stmts in self._sql.values())
+        self._raw_tables: Dict[str, str] = {ctx.table: dataset for dataset, ctx in self._cfg.items()}
+
+    def _on_rows_changed(self, table: str, ids: Sequence[str]) -> None:
+        """Drop cached state for rows a bulk writer changed (``Database.invalidate`` hook).
+
+        Result-table changes evict those LRU entries. Raw-table changes clear the
+        negative cache and the dataset's cached results for the IDs.
+        """
+        dataset = self._raw_tables.get(table)
+        if dataset is not None:
+            tables = [self._sql[(dataset, func)].table for func in self.function_map[dataset]]
+            with self._cache_lock:
+                if not self._missing and not self._lru:
+                    return
+                for id_value in ids:
+                    self._missing.pop((dataset, id_value), None)
+                    for result_table in tables:
+                        self._lru.pop((result_table, id_value), None)
+        elif table in self._result_tables:
+            with self._cache_lock:
+                for id_value in ids:
+                    self._lru.pop((table, id_value), None)
+
+    async def _get_cached_result(
         self,
-        table: str,
-        key_field: str,
+        stmts: _TableStatements,
         id_value: str,
     ) -> Optional[Dict[str, Any]]:
-        """Get cached result from database."""
-        query = f"SELECT payload, created_at FROM {table} WHERE {key_field} = ?"
-        result = self.db.fetchone(query, (id_value,))
+        """Get cached result, checking the in-process LRU before the database."""
+        cache_key = (stmts.table, id_value)
+        cached = self._lookup(cache_key)
+        if cached is not None:
+            return cached
+
+        result = await asyncio.to_thread(self.db.fetchone, stmts.select, (id_value,))
 
         if result:
             payload, created_at = result
-            return {
-                "payload": json.loads(payload),
+            cached = {
+                "payload": self.db.decode_payload(payload),
                 "created_at": created_at,
             }
+            self._remember(cache_key, cached)
+            return cached
         return None
 
+    def _lookup(self, cache_key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        """Return a decoded result from the LRU, marking it most recently used.
+
+        Local writes invalidate entries directly; writes from other processes are only
+        picked up once an entry is older than ``_RESULT_TTL_SECONDS``.
+        """
+        with self._cache_lock:
+            cached = self._lru.get(cache_key)
+            if cached is None:
+                return None
+            stored_at, entry = cached
+            if time.monotonic() - stored_at >= _RESULT_TTL_SECONDS:
+                del self._lru[cache_key]
+                return None
+            self._lru.move_to_end(cache_key)
+            return entry
+
+    def _remember(self, cache_key: Tuple[str, str], entry: Dict[str, Any]) -> None:
+        """Insert a decoded result into the LRU, evicting the oldest entries."""
+        with self._cache_lock:
+            self._lru[cache_key] = (time.monotonic(), entry)
+            self._lru.move_to_end(cache_key)
+            while len(self._lru) > _RESULT_CACHE_SIZE:
+                self._lru.popitem(last=False)
+
+    def _forget(self, table: str, id_value: Optional[str] = None) -> None:
+        """Drop LRU entries for a table, or for a single ID within it."""
+        with self._cache_lock:
+            if id_value is not None:
+                self._lru.pop((table, id_value), None)
+                return
+            for cache_key in [key for key in self._lru if key[0] == table]:
+                del self._lru[cache_key]
+
+    def _is_known_missing(self, dataset: str, id_value: str) -> bool:
+        """Return True if the ID was found missing within the negative-cache TTL."""
+        missing_key = (dataset, id_value)
+        with self._cache_lock:
+            missed_at = self._missing.get(missing_key)
+            if missed_at is None:
+                return False
+            if time.monotonic() - missed_at < _MISSING_TTL_SECONDS:
+                return True
+            del self._missing[missing_key]
+            return False
+
+    def _mark_missing(self, dataset: str, id_value: str) -> None:
+        """Record a raw-table miss, evicting the oldest entries past capacity."""
+        missing_key = (dataset, id_value)
+        with self._cache_lock:
+            self._missing[missing_key] = time.monotonic()
+            self._missing.move_to_end(missing_key)
+            while len(self._missing) > _MISSING_CACHE_SIZE:
+                self._missing.popitem(last=False)
+
+    def _forget_missing(self, dataset: str, id_value: Optional[str] = None) -> None:
+        """Drop negative-cache entries for a dataset, or for a single ID within it."""
+        with self._cache_lock:
+            if id_value is not None:
+                self._missing.pop((dataset, id_value), None)
+                return
+            for missing_key in [key for key in self._missing if key[0] == dataset]:
+                del self._missing[missing_key]
+
     def _store_result(
         self,
-        table: str,
-        key_field: str,
+        stmts: _TableStatements,
         id_value: str,
         payload: Any,
         created_at: str,
     ) -> None:
         """Store result in database."""
-        query = f"""
-            INSERT OR REPLACE INTO {table} ({key_field}, payload, created_at)
-            VALUES (?, ?, ?)
+        self.db.execute(stmts.upsert, (id_value, self.db.encode_payload(payload), created_at))
+
+    def bulk_store(
+        self,
+        dataset: str,
+        func: str,
+        rows: Iterable[Tuple[str, Any, str]],
+    ) -> None:
+        """Write ``(id, payload, created_at)`` results for one function in a single transaction.
+
+        Payloads are encoded here, so callers pass the decoded values. The whole batch
+        commits once instead of paying a journal sync per row.
         """
-        self.db.execute(query, (id_value, json.dumps(payload), created_at))
+        if (dataset, func) not in self._valid_pairs:
+            raise ValueError(f"Invalid function '{func}' for dataset '{dataset}'")
+
+        stmts = self._sql[(dataset, func)]
+        encode = self.db.encode_payload
+        params = [(id_value, encode(payload), created_at) for id_value, payload, created_at in rows]
+        with self.db.transaction():
+            self.db.executemany(stmts.upsert, params)
+        # Drops LRU entries for the rewritten IDs, in this and any other resolver
+        self.db.invalidate(stmts.table, [row[0] for row in params])
 
     # ---------------------------------------------------------------- operations
+    @staticmethod
+    def _close_llm_client(client: Any) -> None:
+        """Release an evicted client if it exposes ``close()``."""
+        close = getattr(client, "close", None)
+        if not callable(close):
+            return
+        try:
+            close()
+        except Exception as exc:  # pragma: no cover - logging side-effect
+            logger.warning("Error closing LLM client: %s", exc)
+
+    def _trim_llm_clients(self) -> None:
+        """Evict least recently used clients until the cache fits its size."""
+        while len(self._llm_clients) > self._llm_client_cache_size:
+            _, client = self._llm_clients.popitem(last=False)
+            self._close_llm_client(client)
+
     def get_llm_client(self, session_id: str, user_id: str) -> Any:
         """Return a cached LLM client instance for the session/user pair."""
         key = (session_id, user_id)
-        if key not in self._llm_clients:
-            self._llm_clients[key] = self._llm_client_factory(session_id=session_id, user_id=user_id)
-        return self._llm_clients[key]
+        client = self._llm_clients.get(key)
+        if client is not None:
+            self._llm_clients.move_to_end(key)
+            return client
+
+        client = self._llm_client_factory(session_id=session_id, user_id=user_id)
+        self._llm_clients[key] = client
+        self._trim_llm_clients()
+        return client
 
     def set_llm_client_factory(self, factory) -> None:
         """Override the LLM client factory and reset cached clients."""
         self._llm_client_factory = factory or create_mock_llm_client
-        self._llm_clients.clear()
+        while self._llm_clients:
+            _, client = self._llm_clients.popitem(last=False)
+            self._close_llm_client(client)
+
+    def set_llm_client_cache_size(self, size: int) -> None:
+        """Change how many LLM clients are kept alive, evicting any excess."""
+        if size < 1:
+            raise ValueError("LLM client cache size must be at least 1")
+        self._llm_client_cache_size = size
+        self._trim_llm_clients()
 
     async def resolve(
         self,
@@ -107,42 +430,38 @@ class FunctionResolver:
         llm_client: Any | None = None,
     ) -> Dict[str, Any]:
         """Resolve function result using cache-or-compute pattern."""
-        if dataset not in self.function_map:
-            raise ValueError(f"Invalid dataset: {dataset}")
-
-        if func not in self.function_map[dataset]:
+        if (dataset, func) not in self._valid_pairs:
+            if dataset not in self._valid_datasets:
+                raise ValueError(f"Invalid dataset: {dataset}")
             raise ValueError(f"Invalid function '{func}' for dataset '{dataset}'")
 
-        config = get_dataset_config(dataset)
-        key_field = config.key_field
-        raw_query = f"""
-            SELECT raw_data, title, category, risk_theme, risk_subtheme
-            FROM {config.table}
-            WHERE {key_field} = ?
-        """
-        raw_result = self.db.fetchone(raw_query, (id,))
+        if self._is_known_missing(dataset, id):
+            raise ValueError(f"ID '{id}' not found in {dataset}")
+
+        stmts = self._sql[(dataset, func)]
+        if not refresh:
+            # Hot path: an LRU hit needs neither the raw row nor a thread hop
+            cached = self._lookup((stmts.table, id))
+            if cached is not None:
+                return {
+                    "status": "ok",
+                    "source": "cache",
+                    "payload": cached["payload"],
+                    "created_at": cached["created_at"],
+                }
+
+        cfg = self._cfg[dataset]
+        raw_result = await asyncio.to_thread(self.db.fetchone, cfg.raw_select_sql, (id,))
 
         if not raw_result:
+            self._mark_missing(dataset, id)
             raise ValueError(f"ID '{id}' not found in {dataset}")
-        raw_data_json, title, category, risk_theme, risk_subtheme = raw_result
+        raw_record = cfg.build_raw_record(id, raw_result)
 
-        if raw_data_json:
-            raw_record = json.loads(raw_data_json)
+        if refresh:
+            self._forget(stmts.table, id)
         else:
-            raw_record = {
-                config.key_field: id,
-                config.title_field: title,
-                config.theme_field: risk_theme,
-            }
-            if config.category_field:
-                raw_record[config.category_field] = category
-            if config.subtheme_field:
-                raw_record[config.subtheme_field] = risk_subtheme
-
-        table_name = f"{dataset}_{func}"
-
-        if not refresh:
-            cached = self._get_cached_result(table_name, key_field, id)
+            cached = await self._get_cached_result(stmts, id)
             if cached:
                 return {
                     "status": "ok",
@@ -151,46 +470,269 @@ class FunctionResolver:
                     "created_at": cached["created_at"],
                 }
 
-        compute_func = self.function_map[dataset][func]
-        signature = inspect.signature(compute_func)
+        cache_key = (stmts.table, id)
+        inflight = self._inflight.get(cache_key)
+        if inflight is None:
+            # Compute in a task of its own so that cancelling whichever caller started it
+            # does not cancel the other callers sharing the result
+            inflight = asyncio.ensure_future(
+                self._compute_result(dataset, func, id, session_id, user_id, raw_record, stmts, llm_client)
+            )
+            self._inflight[cache_key] = inflight
+            inflight.add_done_callback(partial(self._finish_inflight, cache_key))
+        return await asyncio.shield(inflight)
+
+    def _finish_inflight(self, cache_key: Tuple[str, str], task: "asyncio.Future[Any]") -> None:
+        """Drop a finished computation from the in-flight table."""
+        if self._inflight.get(cache_key) is task:
+            del self._inflight[cache_key]
+        _retrieve_exception(task)
+
+    async def _compute_result(
+        self,
+        dataset: str,
+        func: str,
+        id: str,
+        session_id: str,
+        user_id: str,
+        raw_record: Dict[str, Any],
+        stmts: _TableStatements,
+        llm_client: Any | None,
+    ) -> Dict[str, Any]:
+        """Compute a function result and write it through to the cache."""
+        payload = await self._compute_payload(
+            dataset, func, id, session_id, user_id, raw_record, llm_client
+        )
+
+        created_at = utc_now_iso()
+        await asyncio.to_thread(self._store_result, stmts, id, payload, created_at)
+        self._forget_missing(dataset, id)
+        self._remember((stmts.table, id), {"payload": payload, "created_at": created_at})
+
+        return {
+            "status": "ok",
+            "source": "computed",
+            "payload": payload,
+            "created_at": created_at,
+        }
+
+    async def _compute_payload(
+        self,
+        dataset: str,
+        func: str,
+        id: str,
+        session_id: str,
+        user_id: str,
+        raw_record: Dict[str, Any],
+        llm_client: Any | None,
+    ) -> Any:
+        """Invoke the compute function for a single ID."""
+        key = (dataset, func)
+        async_func = self._async_fn.get(key)
+        compute_func = async_func or self._sync_fn[key]
         kwargs: Dict[str, Any] = {}
-        if "llm_client" in signature.parameters:
+        if compute_func in self._needs_llm:
             kwargs["llm_client"] = llm_client or self.get_llm_client(session_id, user_id)
 
         try:
-            payload = compute_func(id, session_id, user_id, raw_record, **kwargs)
-            if inspect.isawaitable(payload):
-                payload = await payload
+            if async_func is not None:
+                payload = await async_func(id, session_id, user_id, raw_record, **kwargs)
+            else:
+                payload = compute_func(id, session_id, user_id, raw_record, **kwargs)
         except Exception as exc:  # pragma: no cover - logging side-effect
             logger.error("Error computing %s for %s: %s", func, id, exc)
             raise RuntimeError(f"Failed to compute {func}: {exc}") from exc
 
-        created_at = datetime.utcnow().isoformat() + "Z"
-        self._store_result(table_name, key_field, id, payload, created_at)
+        return payload
 
-        return {
-            "status": "ok",
-            "source": "computed",
-            "payload": payload,
-            "created_at": created_at,
-        }
+    async def resolve_batch(
+        self,
+        dataset: str,
+        func: str,
+        ids: List[str],
+        session_id: str,
+        user_id: str,
+        refresh: bool = False,
+        llm_client: Any | None = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Resolve one function for many IDs with batched cache reads and writes.
 
-    def get_all_results(
+        Returns a mapping of ID to the same shape ``resolve`` produces. IDs that do not
+        exist in the dataset are omitted; IDs whose computation failed map to an
+        ``{"status": "error", ...}`` entry instead of raising.
+        """
+        if (dataset, func) not in self._valid_pairs:
+            if dataset not in self._valid_datasets:
+                raise ValueError(f"Invalid dataset: {dataset}")
+            raise ValueError(f"Invalid function '{func}' for dataset '{dataset}'")
+
+        cfg = self._cfg[dataset]
+        stmts = self._sql[(dataset, func)]
+        table_name = stmts.table
+        unique_ids = list(dict.fromkeys(ids))
+        results: Dict[str, Dict[str, Any]] = {}
+
+        # Cache hits: LRU first, then one IN (...) query per chunk for the rest
+        lookup_ids: List[str] = []
+        for id_value in unique_ids:
+            if refresh:
+                self._forget(table_name, id_value)
+                continue
+            cached = self._lookup((table_name, id_value))
+            if cached is None:
+                lookup_ids.append(id_value)
+                continue
+            results[id_value] = {"status": "ok", "source": "cache", **cached}
+
+        for chunk in chunked(lookup_ids):
+            query = in_clause(stmts.select_in, len(chunk))
+            rows = await asyncio.to_thread(self.db.fetchall, query, tuple(chunk))
+            for id_value, payload, created_at in rows:
+                cached = {"payload": self.db.decode_payload(payload), "created_at": created_at}
+                self._remember((table_name, id_value), cached)
+                results[id_value] = {"status": "ok", "source": "cache", **cached}
+
+        miss_ids = [id_value for id_value in unique_ids if id_value not in results]
+        if not miss_ids:
+            return {id_value: results[id_value] for id_value in unique_ids if id_value in results}
+
+        raw_records: Dict[str, Dict[str, Any]] = {}
+        lookup_ids = [
+            id_value for id_value in miss_ids if not self._is_known_missing(dataset, id_value)
+        ]
+        for chunk in chunked(lookup_ids):
+            query = in_clause(cfg.raw_select_in, len(chunk))
+            rows = await asyncio.to_thread(self.db.fetchall, query, tuple(chunk))
+            for row in rows:
+                raw_records[row[0]] = cfg.build_raw_record(row[0], row[1:])
+        for id_value in lookup_ids:
+            if id_value not in raw_records:
+                self._mark_missing(dataset, id_value)
+
+        # Join computations already in flight; own the rest
+        loop = asyncio.get_running_loop()
+        owned: Dict[str, asyncio.Future] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        for id_value in miss_ids:
+            if id_value not in raw_records:
+                continue
+            inflight = self._inflight.get((table_name, id_value))
+            if inflight is not None:
+                waiting[id_value] = inflight
+            else:
+                owned[id_value] = self._inflight[(table_name, id_value)] = loop.create_future()
+
+        async def compute_owned() -> None:
+            try:
+                payloads = await asyncio.gather(
+                    *(
+                        self._compute_payload(
+                            dataset, func, id_value, session_id, user_id, raw_records[id_value], llm_client
+                        )
+                        for id_value in owned
+                    ),
+                    return_exceptions=True,
+                )
+
+                created_at = utc_now_iso()
+                write_rows: List[Tuple[str, Any, str]] = []
+                for id_value, payload in zip(owned, payloads):
+                    if isinstance(payload, BaseException):
+                        results[id_value] = {"status": "error", "source": "computed", "error": str(payload)}
+                        owned[id_value].set_exception(payload)
+                        owned[id_value].exception()  # Mark retrieved; awaiters re-raise it themselves
+                        continue
+                    write_rows.append((id_value, payload, created_at))
+                    results[id_value] = {
+                        "status": "ok",
+                        "source": "computed",
+                        "payload": payload,
+                        "created_at": created_at,
+                    }
+
+                if write_rows:
+                    await asyncio.to_thread(self.bulk_store, dataset, func, write_rows)
+                    for id_value, _, _ in write_rows:
+                        self._forget_missing(dataset, id_value)
+
+                for id_value, future in owned.items():
+                    if future.done():
+                        continue
+                    result = results[id_value]
+                    self._remember(
+                        (table_name, id_value),
+                        {"payload": result["payload"], "created_at": result["created_at"]},
+                    )
+                    future.set_result(result)
+            except BaseException as exc:
+                for future in owned.values():
+                    if future.done():
+                        continue
+                    if isinstance(exc, asyncio.CancelledError):
+                        future.cancel()
+                    else:
+                        future.set_exception(exc)
+                        future.exception()
+                raise
+            finally:
+                for id_value in owned:
+                    self._inflight.pop((table_name, id_value), None)
+
+        if owned:
+            # Shielded task: cancelling this caller must not cancel callers waiting on these IDs
+            work = asyncio.ensure_future(compute_owned())
+            work.add_done_callback(_retrieve_exception)
+            await asyncio.shield(work)
+
+        for id_value, future in waiting.items():
+            try:
+                results[id_value] = await asyncio.shield(future)
+            except Exception as exc:
+                results[id_value] = {"status": "error", "source": "computed", "error": str(exc)}
+
+        return {id_value: results[id_value] for id_value in unique_ids if id_value in results}
+
+    async def get_all_results(
         self,
         dataset: str,
         id: str
     ) -> Dict[str, Optional[Dict[str, Any]]]:
-        """Get all AI function results for an ID."""
-        if dataset not in self.function_map:
+        """Get all AI function results for an ID.
+
+        Functions not in the in-process LRU are read with one ``UNION ALL`` query, and
+        plain JSON payloads from that query are decoded with a single ``json_loads`` call.
+        """
+        if dataset not in self._valid_datasets:
             raise ValueError(f"Invalid dataset: {dataset}")
 
-        config = get_dataset_config(dataset)
-        key_field = config.key_field
         results: Dict[str, Optional[Dict[str, Any]]] = {}
+        pending: Dict[str, str] = {}
 
         for func in self.function_map[dataset]:
-            table_name = f"{dataset}_{func}"
-            results[func] = self._get_cached_result(table_name, key_field, id)
+            stmts = self._sql[(dataset, func)]
+            cached = self._lookup((stmts.table, id))
+            if cached is None:
+                pending[stmts.table] = func
+            results[func] = cached
+
+        if pending:
+            query = " UNION ALL ".join(
+                self._sql[(dataset, func)].select_tagged for func in pending.values()
+            )
+            rows = await asyncio.to_thread(self.db.fetchall, query, (id,) * len(pending))
+
+            # Compressed blobs need their own decode; plain JSON text is parsed in one call
+            text_rows = [row for row in rows if isinstance(row[1], str)]
+            decoded = json_loads("[" + ",".join(row[1] for row in text_rows) + "]")
+            payloads = {row[0]: payload for row, payload in zip(text_rows, decoded)}
+            for table, payload, _ in rows:
+                if table not in payloads:
+                    payloads[table] = self.db.decode_payload(payload)
+
+            for table, _, created_at in rows:
+                cached = {"payload": payloads[table], "created_at": created_at}
+                self._remember((table, id), cached)
+                results[pending[table]] = cached
 
         return results
 
@@ -200,27 +742,30 @@ class FunctionResolver:
         func: Optional[str] = None,
         id: Optional[str] = None
     ) -> int:
-        """Clear cached results."""
-        if dataset not in self.function_map:
+        """Clear cached results, with the batch-compute memo rows stored for them."""
+        if dataset not in self._valid_datasets:
             raise ValueError(f"Invalid dataset: {dataset}")
+        if func and (dataset, func) not in self._valid_pairs:
+            raise ValueError(f"Invalid function '{func}' for dataset '{dataset}'")
 
-        config = get_dataset_config(dataset)
-        key_field = config.key_field
         cleared = 0
 
         functions = [func] if func else list(self.function_map[dataset].keys())
-
-        for function_name in functions:
-            table_name = f"{dataset}_{function_name}"
-
-            if id:
-                query = f"DELETE FROM {table_name} WHERE {key_field} = ?"
-                cursor = self.db.execute(query, (id,))
-            else:
-                query = f"DELETE FROM {table_name}"
-                cursor = self.db.execute(query)
-
-            cleared += cursor.rowcount
+        statements = [self._sql[(dataset, function_name)] for function_name in functions]
+
+        # One transaction for all tables so a full-dataset clear commits once
+        with self.db.transaction():
+            for stmts in statements:
+                if id:
+                    cleared += self.db.execute_count(stmts.delete_one, (id,))
+                    self.db.execute(stmts.delete_memo_one, (id,))
+                else:
+                    cleared += self.db.execute_count(stmts.delete_all)
+                    self.db.execute(stmts.delete_memo_all)
+
+        for stmts in statements:
+            self._forget(stmts.table, id or None)
+        self._forget_missing(dataset, id or None)
 
         return cleared
 
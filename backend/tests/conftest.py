@@ -0,0 +1,52 @@
+"""Shared fixtures: every test runs against its own SQLite database."""
+import csv
+
+import pytest
+
+import db as db_module
+from dataset_config import get_dataset_config
+from utils.csv_ingest import CSVIngester
+
+ISSUE_FIELDS = ["issue_id", "issues_type", "issue_title", "risk_theme"]
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh SQLite ``Database`` installed as the ``get_db()`` singleton."""
+    monkeypatch.setitem(db_module._DB_CONFIG.setdefault("database", {}), "backend", "sqlite")
+    database = db_module.Database(db_path=str(tmp_path / "dashboard.db"))
+    monkeypatch.setattr(db_module, "_db_instance", database)
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def ingest_issues(db, tmp_path):
+    """Return ``ingest(ids)``, which writes those issues as the CSV and ingests it."""
+    ingester = CSVIngester(csv_dir=str(tmp_path))
+    path = tmp_path / get_dataset_config("issues").csv_filename
+
+    def ingest(ids):
+        with open(path, "w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=ISSUE_FIELDS)
+            writer.writeheader()
+            for issue_id in ids:
+                writer.writerow(
+                    {
+                        "issue_id": issue_id,
+                        "issues_type": "Audit Finding",
+                        "issue_title": f"Title of {issue_id}",
+                        "risk_theme": "Technology Change, Failed Deployment",
+                    }
+                )
+        return ingester.ingest_dataset("issues")
+
+    return ingest
+
+
+@pytest.fixture
+def issues(ingest_issues):
+    """Ingest a handful of issues and return their IDs."""
+    ids = [f"ISS-{n}" for n in range(1, 6)]
+    ingest_issues(ids)
+    return ids
@@ -0,0 +1,112 @@
+"""BatchProcessor batch compute: the compute memo and the compute/write pipeline."""
+import asyncio
+import time
+
+from db import COMPUTE_CACHE_TABLE
+from services.resolver import FunctionResolver
+from utils import batch_utils
+from utils.batch_utils import BatchProcessor
+
+
+def compute(id, session_id, user_id, record):
+    return {"id": id}
+
+
+def batch_compute(processor, ids=None, force_recompute=False, func=compute):
+    return asyncio.run(
+        processor.batch_compute_ai_function(
+            "issues", "enrichment", func, ids=ids, force_recompute=force_recompute
+        )
+    )
+
+
+def memo_rows(db):
+    return db.fetchone(f"SELECT COUNT(*) FROM {COMPUTE_CACHE_TABLE}")[0]
+
+
+def test_recompute_after_row_loss_reuses_memo(issues, db):
+    processor = BatchProcessor()
+    batch_compute(processor)
+    db.execute("DELETE FROM issues_enrichment")
+
+    result = batch_compute(processor)
+
+    assert result["reused"] == len(issues)
+    assert result["successful"] == len(issues)
+
+
+def test_clear_cache_purges_memo_rows(issues, db):
+    processor = BatchProcessor()
+    batch_compute(processor)
+
+    FunctionResolver().clear_cache("issues", "enrichment", issues[0])
+    result = batch_compute(processor)
+    assert "reused" not in result
+    assert result["processed"] == 1
+
+    FunctionResolver().clear_cache("issues", "enrichment")
+    result = batch_compute(processor)
+    assert "reused" not in result
+    assert result["processed"] == len(issues)
+
+
+def test_batch_delete_purges_memo_rows(issues, db):
+    processor = BatchProcessor()
+    batch_compute(processor)
+
+    processor.batch_delete("issues", issues[:2])
+
+    assert memo_rows(db) == len(issues) - 2
+
+
+def test_memo_table_is_bounded(issues, db, monkeypatch):
+    monkeypatch.setattr(batch_utils, "COMPUTE_CACHE_MAX_ROWS", 3)
+
+    batch_compute(BatchProcessor())
+
+    assert memo_rows(db) == 3
+
+
+def test_executor_failure_counts_batch_as_failed(issues, monkeypatch):
+    compute_batch = batch_utils._compute_batch
+
+    def flaky(compute_func, batch, *args):
+        if any(id_val == issues[0] for id_val, _ in batch):
+            raise RuntimeError("worker died")
+        return compute_batch(compute_func, batch, *args)
+
+    monkeypatch.setattr(batch_utils, "_compute_batch", flaky)
+
+    result = batch_compute(BatchProcessor(max_workers=len(issues), batch_size=1))
+
+    assert result["processed"] == result["total"] == len(issues)
+    assert result["failed"] == 1
+    assert result["successful"] == len(issues) - 1
+
+
+def test_slow_writer_bounds_computed_batches(ingest_issues, monkeypatch):
+    ingest_issues([f"ISS-{n}" for n in range(20)])
+    processor = BatchProcessor(max_workers=1, batch_size=1)
+    counts = {"computed": 0, "written": 0, "peak": 0}
+    compute_batch = batch_utils._compute_batch
+    write_batch = processor._write_batch
+
+    def counting_compute(*args):
+        outcome = compute_batch(*args)
+        counts["computed"] += 1
+        return outcome
+
+    def slow_write(ai_table, key_field, computed, *args):
+        counts["peak"] = max(counts["peak"], counts["computed"] - counts["written"])
+        time.sleep(0.01)
+        counts["written"] += len(computed)
+        return write_batch(ai_table, key_field, computed, *args)
+
+    monkeypatch.setattr(batch_utils, "_compute_batch", counting_compute)
+    monkeypatch.setattr(processor, "_write_batch", slow_write)
+
+    result = batch_compute(processor)
+
+    assert result["successful"] == 20
+    # The batch being written plus at most 2 * max_workers computed or queued behind it
+    assert counts["peak"] <= 3
@@ -0,0 +1,42 @@
+"""CSVIngester counts with duplicate keys pre-filtered before insert."""
+from utils.csv_ingest import CSVIngester
+
+
+def stored_ids(db):
+    return [row[0] for row in db.fetchall("SELECT issue_id FROM issues_raw ORDER BY issue_id")]
+
+
+def test_first_ingest_counts_every_row(ingest_issues, db):
+    result = ingest_issues(["ISS-1", "ISS-2", "ISS-3"])
+
+    assert (result["successful"], result["failed"]) == (3, 0)
+    assert stored_ids(db) == ["ISS-1", "ISS-2", "ISS-3"]
+
+
+def test_reingest_counts_existing_rows_as_successful(ingest_issues, db):
+    ingest_issues(["ISS-1", "ISS-2", "ISS-3"])
+
+    result = ingest_issues(["ISS-1", "ISS-2", "ISS-3", "ISS-4"])
+
+    assert (result["successful"], result["failed"]) == (4, 0)
+    assert stored_ids(db) == ["ISS-1", "ISS-2", "ISS-3", "ISS-4"]
+
+
+def test_duplicate_within_file_keeps_first_row(ingest_issues, db):
+    result = ingest_issues(["ISS-1", "ISS-2", "ISS-1"])
+
+    assert (result["successful"], result["failed"]) == (3, 0)
+    assert stored_ids(db) == ["ISS-1", "ISS-2"]
+
+
+def test_insert_failure_does_not_count_duplicates_as_successful(ingest_issues, db, monkeypatch):
+    ingest_issues(["ISS-1", "ISS-2"])
+    monkeypatch.setattr(
+        CSVIngester, "_insert_statement", lambda self, config, rows=1: "INSERT INTO missing_table VALUES (?)"
+    )
+
+    result = ingest_issues(["ISS-1", "ISS-2", "ISS-3", "ISS-4"])
+
+    assert result["successful"] == 0
+    assert result["failed"] == 2
+    assert stored_ids(db) == ["ISS-1", "ISS-2"]
@@ -0,0 +1,108 @@
+"""FunctionResolver caching: LRU invalidation and expiry, negative cache, single-flight."""
+import asyncio
+
+import pytest
+
+from services import resolver as resolver_module
+from services.resolver import FunctionResolver
+
+
+def resolve(resolver, issue_id, func="root_cause", refresh=False):
+    return asyncio.run(resolver.resolve("issues", func, issue_id, "session", "user", refresh=refresh))
+
+
+def test_second_resolve_is_served_from_cache(issues):
+    resolver = FunctionResolver()
+
+    first = resolve(resolver, issues[0])
+    second = resolve(resolver, issues[0])
+
+    assert first["source"] == "computed"
+    assert second["source"] == "cache"
+    assert second["payload"] == first["payload"]
+
+
+def test_bulk_store_invalidates_cached_result(issues):
+    resolver = FunctionResolver()
+    resolve(resolver, issues[0])
+
+    resolver.bulk_store("issues", "root_cause", [(issues[0], {"rewritten": True}, "2026-01-01T00:00:00Z")])
+
+    assert resolve(resolver, issues[0])["payload"] == {"rewritten": True}
+
+
+def test_bulk_store_invalidates_other_resolvers(issues):
+    reader, writer = FunctionResolver(), FunctionResolver()
+    resolve(reader, issues[0])
+
+    writer.bulk_store("issues", "root_cause", [(issues[0], {"rewritten": True}, "2026-01-01T00:00:00Z")])
+
+    assert resolve(reader, issues[0])["payload"] == {"rewritten": True}
+
+
+def test_cached_result_expires_after_ttl(issues, db, monkeypatch):
+    resolver = FunctionResolver()
+    resolve(resolver, issues[0])
+    # A write the resolver is not told about, as from another process
+    db.execute("UPDATE issues_root_cause SET payload = ? WHERE issue_id = ?", ('{"external": 1}', issues[0]))
+
+    assert resolve(resolver, issues[0])["payload"] != {"external": 1}
+
+    monkeypatch.setattr(resolver_module, "_RESULT_TTL_SECONDS", 0.0)
+    assert resolve(resolver, issues[0])["payload"] == {"external": 1}
+
+
+def test_get_all_results_sees_results_written_elsewhere(issues, db):
+    resolver = FunctionResolver()
+
+    before = asyncio.run(resolver.get_all_results("issues", issues[0]))
+    assert before["root_cause"] is None
+
+    db.execute(
+        "INSERT INTO issues_root_cause (issue_id, payload, created_at) VALUES (?, ?, ?)",
+        (issues[0], '{"external": 1}', "2026-01-01T00:00:00Z"),
+    )
+
+    after = asyncio.run(resolver.get_all_results("issues", issues[0]))
+    assert after["root_cause"]["payload"] == {"external": 1}
+
+
+def test_clear_cache_drops_cached_result(issues):
+    resolver = FunctionResolver()
+    resolve(resolver, issues[0])
+
+    assert resolver.clear_cache("issues", "root_cause", issues[0]) == 1
+    assert resolve(resolver, issues[0])["source"] == "computed"
+
+
+def test_missing_id_is_found_after_ingest(issues, ingest_issues):
+    resolver = FunctionResolver()
+    with pytest.raises(ValueError, match="not found"):
+        resolve(resolver, "ISS-NEW")
+
+    ingest_issues(["ISS-NEW"])
+
+    assert resolve(resolver, "ISS-NEW")["source"] == "computed"
+
+
+def test_concurrent_misses_share_one_computation(issues, monkeypatch):
+    resolver = FunctionResolver()
+    calls = []
+
+    async def compute(id, session_id, user_id, record):
+        calls.append(id)
+        await asyncio.sleep(0.05)
+        return {"id": id}
+
+    monkeypatch.setitem(resolver._async_fn, ("issues", "slow_enrichment"), compute)
+
+    async def run():
+        return await asyncio.gather(
+            *(resolver.resolve("issues", "slow_enrichment", issues[0], "session", "user") for _ in range(5))
+        )
+
+    results = asyncio.run(run())
+
+    assert calls == [issues[0]]
+    assert all(result["payload"] == {"id": issues[0]} for result in results)
+    assert not resolver._inflight
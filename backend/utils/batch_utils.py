@@ -1,29 +1,168 @@
 """Batch utilities for bulk processing of AI functions and data operations."""
 import asyncio
+import csv
+import hashlib
 import inspect
+import io
 import json
 import logging
+import multiprocessing
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime
-from typing import Any, Callable, Dict, List, Optional, Tuple
-
-from db import get_db
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from db import (
+    BULK_LOAD_PRAGMAS,
+    COMPUTE_CACHE_MAX_ROWS,
+    COMPUTE_CACHE_TABLE,
+    SQL_PARAM_CHUNK,
+    chunked,
+    get_db,
+    in_clause,
+    json_dumps,
+    json_loads,
+    utc_now_iso,
+)
 from dataset_config import get_dataset_config
 
 logger = logging.getLogger(__name__)
 
+# Characters of export text buffered per streamed chunk
+EXPORT_CHUNK_CHARS = 64 << 10
+
+
+def _function_id(compute_func: Callable[..., Any]) -> str:
+    """Identify a compute function by its import path for the compute cache."""
+    qualname = getattr(compute_func, "__qualname__", type(compute_func).__qualname__)
+    return f"{getattr(compute_func, '__module__', '')}.{qualname}"
+
+
+def _input_hash(ai_table: str, function_id: str, raw_record: Dict[str, Any]) -> str:
+    """Digest a compute input (target table, compute function and canonical record JSON)."""
+    canonical = json.dumps(raw_record, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(ai_table.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(function_id.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(canonical.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _compute_batch(
+    compute_func: Callable[[str, str, str, Dict[str, Any]], Any],
+    batch: List[Tuple[str, Dict[str, Any]]],
+    session_id: str,
+    user_id: str,
+) -> Tuple[List[Tuple[str, Any]], List[str]]:
+    """Run ``compute_func`` over a batch, returning ``(id, result)`` pairs and error strings.
+
+    Kept at module level and free of database access so it can run in a
+    ``ProcessPoolExecutor`` worker.
+    """
+    computed: List[Tuple[str, Any]] = []
+    errors: List[str] = []
+
+    for id_val, raw_record in batch:
+        try:
+            result = compute_func(id_val, session_id, user_id, raw_record)
+            if inspect.isawaitable(result):
+                result = asyncio.run(result)
+            computed.append((id_val, result))
+        except Exception as exc:  # pragma: no cover - logging side-effect
+            logger.error("Error processing %s: %s", id_val, exc)
+            errors.append(f"{id_val}: {exc}")
+
+    return computed, errors
+
+
+def _unique_ids(ids: List[str], operation: str) -> List[str]:
+    """Drop repeated IDs (keeping first-seen order), warning so callers can fix the source."""
+    unique = list(dict.fromkeys(ids))
+    if len(unique) != len(ids):
+        logger.warning("%s received %d duplicate IDs; processing each once", operation, len(ids) - len(unique))
+    return unique
+
 
 class BatchProcessor:
     """Handle batch processing for AI functions and bulk operations."""
 
-    def __init__(self, max_workers: int = 4, batch_size: int = 100):
-        """Initialize batch processor."""
+    # Statement text per (kind, table, key_field), shared by every processor instance
+    _sql_cache: Dict[Tuple[str, str, str], str] = {}
+
+    # get_batch_status results per dataset as (monotonic timestamp, status); the admin
+    # endpoint builds a processor per request, so this lives on the class as well
+    _status_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+    _status_ttl: float = 2.0
+
+    _SQL_TEMPLATES: Dict[str, str] = {
+        "select_raw": "SELECT {key_field}, raw_data, title, category, risk_theme, risk_subtheme FROM {table}",
+        "select_raw_in": (
+            "SELECT {key_field}, raw_data, title, category, risk_theme, risk_subtheme "
+            "FROM {table} WHERE {key_field} IN ("
+        ),
+        "select_keys": "SELECT {key_field} FROM {table}",
+        "select_keys_in": "SELECT {key_field} FROM {table} WHERE {key_field} IN (",
+        "select_export_first": (
+            "SELECT {key_field}, title, category, risk_theme, risk_subtheme, raw_data "
+            "FROM {table} ORDER BY {key_field} LIMIT ?"
+        ),
+        "select_export_after": (
+            "SELECT {key_field}, title, category, risk_theme, risk_subtheme, raw_data "
+            "FROM {table} WHERE {key_field} > ? ORDER BY {key_field} LIMIT ?"
+        ),
+        "select_export_in": (
+            "SELECT {key_field}, title, category, risk_theme, risk_subtheme, raw_data "
+            "FROM {table} WHERE {key_field} IN ("
+        ),
+        "select_results_in": "SELECT {key_field}, payload, created_at FROM {table} WHERE {key_field} IN (",
+        "upsert_result": "INSERT OR REPLACE INTO {table} ({key_field}, payload, created_at) VALUES (?, ?, ?)",
+        "select_memo_in": "SELECT input_hash, payload FROM {table} WHERE input_hash IN (",
+        "upsert_memo": (
+            "INSERT OR REPLACE INTO {table} "
+            "(input_hash, function_name, result_table, key_value, payload, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)"
+        ),
+        "delete_memo_in": "DELETE FROM {table} WHERE result_table = ? AND key_value IN (",
+        "count_memo": "SELECT COUNT(*) FROM {table}",
+        "evict_memo": (
+            "DELETE FROM {table} WHERE input_hash IN "
+            "(SELECT input_hash FROM {table} ORDER BY created_at LIMIT ?)"
+        ),
+        "delete_in": "DELETE FROM {table} WHERE {key_field} IN (",
+    }
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        batch_size: int = 1000,
+        compute_is_io_bound: bool = True,
+        tuning: bool = True,
+    ):
+        """Initialize batch processor.
+
+        ``batch_size`` caps how many results are committed per write transaction; larger
+        batches amortize SQLite commits, and work is still split across all workers when
+        there are fewer items than ``max_workers * batch_size``.
+
+        ``compute_is_io_bound`` selects threads (network-bound AI calls) or worker
+        processes (CPU-bound compute functions). With processes, ``compute_func`` must be
+        picklable (a module-level function that does not close over the database), and all
+        database writes stay in this process. Workers are spawned rather than forked so they
+        never inherit the open SQLite connection, its lock or the running event loop.
+
+        ``tuning`` applies ``BULK_LOAD_PRAGMAS`` (WAL, ``synchronous=NORMAL``, in-memory temp
+        storage, a 256MB page cache and 1GB memory map) to the shared SQLite connection
+        while ``batch_compute_ai_function`` writes, restoring the configured values
+        afterwards. Other methods never change the connection settings.
+        """
         self.max_workers = max_workers
         self.batch_size = batch_size
+        self.compute_is_io_bound = compute_is_io_bound
         self.db = get_db()
+        self._pragmas: Dict[str, Any] = BULK_LOAD_PRAGMAS if tuning else {}
 
-    def batch_compute_ai_function(
+    async def batch_compute_ai_function(
         self,
         dataset: str,
         function_name: str,
@@ -34,51 +173,21 @@ class BatchProcessor:
         force_recompute: bool = False,
         progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
     ) -> Dict[str, Any]:
-        """Batch compute an AI function for multiple IDs."""
+        """Batch compute an AI function for multiple IDs.
+
+        Compute batches run on the executor and feed a bounded queue; a single writer
+        drains it and commits up to ``batch_size`` results per transaction, so database
+        writes overlap with computation while SQLite keeps one writer.
+        """
         config = get_dataset_config(dataset)
         key_field = config.key_field
-        table_name = config.table
-
-        # Get IDs to process
-        if ids is None:
-            query = f"SELECT {key_field}, raw_data, title, category, risk_theme, risk_subtheme FROM {table_name}"
-            rows = self.db.fetchall(query)
-            ids_to_process = []
-            for row in rows:
-                raw_record = json.loads(row[1]) if row[1] else {
-                    key_field: row[0],
-                    "title": row[2],
-                    "category": row[3],
-                    "risk_theme": row[4],
-                    "risk_subtheme": row[5],
-                }
-                ids_to_process.append((row[0], raw_record))
-        else:
-            ids_to_process = []
-            for id_val in ids:
-                query = f"SELECT raw_data, title, category, risk_theme, risk_subtheme FROM {table_name} WHERE {key_field} = ?"
-                result = self.db.fetchone(query, (id_val,))
-                if result:
-                    raw_data_json, title, category, risk_theme, risk_subtheme = result
-                    raw_record = json.loads(raw_data_json) if raw_data_json else {
-                        key_field: id_val,
-                        "title": title,
-                        "category": category,
-                        "risk_theme": risk_theme,
-                        "risk_subtheme": risk_subtheme,
-                    }
-                    ids_to_process.append((id_val, raw_record))
+        ai_table = f"{dataset}_{function_name}"
+        if ids is not None:
+            ids = _unique_ids(ids, "batch_compute_ai_function")
 
-        # Filter out already computed if not forcing recompute
-        if not force_recompute:
-            filtered_ids: List[Tuple[str, Dict[str, Any]]] = []
-            ai_table = f"{dataset}_{function_name}"
-            for id_val, record in ids_to_process:
-                query = f"SELECT 1 FROM {ai_table} WHERE {key_field} = ?"
-                result = self.db.fetchone(query, (id_val,))
-                if not result:
-                    filtered_ids.append((id_val, record))
-            ids_to_process = filtered_ids
+        ids_to_process = await asyncio.to_thread(
+            self._load_work, dataset, function_name, ids, force_recompute
+        )
 
         if not ids_to_process:
             return {
@@ -99,38 +208,123 @@ class BatchProcessor:
             "errors": [],
         }
 
+        def tally(batch_result: Dict[str, Any]) -> None:
+            results["processed"] += batch_result["processed"]
+            results["successful"] += batch_result["successful"]
+            results["failed"] += batch_result["failed"]
+            results["errors"].extend(batch_result.get("errors", [])[:10])
+            if progress_callback:
+                try:
+                    progress_callback(results)
+                except Exception as exc:  # pragma: no cover - logging side-effect
+                    # A broken progress hook must not take the writer down with it
+                    logger.warning("Batch progress callback failed: %s", exc)
+
         start_time = time.time()
 
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = []
-            for i in range(0, len(ids_to_process), self.batch_size):
-                batch = ids_to_process[i : i + self.batch_size]
-                future = executor.submit(
-                    self._process_batch,
-                    dataset,
-                    function_name,
-                    compute_func,
-                    batch,
-                    key_field,
-                    session_id,
-                    user_id,
-                )
-                futures.append(future)
+        function_id = _function_id(compute_func)
+        input_hashes = {
+            id_val: _input_hash(ai_table, function_id, record) for id_val, record in ids_to_process
+        }
 
-            for future in as_completed(futures):
+        # Reuse outputs memoized for identical inputs (e.g. after a re-ingest)
+        if not force_recompute:
+            ids_to_process, batch_result = await asyncio.to_thread(
+                self._reuse_cached_outputs,
+                ai_table,
+                key_field,
+                ids_to_process,
+                input_hashes,
+                function_id,
+            )
+            if batch_result["processed"]:
+                tally(batch_result)
+                results["reused"] = batch_result["processed"]
+
+        # Keep every worker busy on small runs; never exceed batch_size per transaction
+        write_size = self.batch_size
+        compute_size = max(1, min(write_size, -(-len(ids_to_process) // self.max_workers)))
+        queue: "asyncio.Queue[Optional[Tuple[List[Tuple[str, Any]], List[str]]]]" = asyncio.Queue()
+        # Batches computing or waiting for the writer; bounds finished outcomes held in memory
+        slots = asyncio.Semaphore(2 * self.max_workers)
+        loop = asyncio.get_running_loop()
+
+        async def compute(executor: Any, batch: List[Tuple[str, Dict[str, Any]]]) -> None:
+            await slots.acquire()
+            try:
+                outcome = await loop.run_in_executor(
+                    executor, _compute_batch, compute_func, batch, session_id, user_id
+                )
+            except Exception as exc:  # pragma: no cover - logging side-effect
+                logger.error("Batch processing error: %s", exc)
+                # Count the whole batch as failed so processed + failed covers the input
+                outcome = ([], [f"{id_val}: {exc}" for id_val, _ in batch])
+            except BaseException:
+                slots.release()
+                raise
+            queue.put_nowait(outcome)
+
+        async def write() -> None:
+            pending: List[Tuple[str, Any]] = []
+            errors: List[str] = []
+
+            async def flush() -> None:
+                if pending or errors:
+                    tally(
+                        await asyncio.to_thread(
+                            self._write_batch,
+                            ai_table,
+                            key_field,
+                            list(pending),
+                            list(errors),
+                            input_hashes,
+                            function_id,
+                        )
+                    )
+                    pending.clear()
+                    errors.clear()
+
+            while True:
+                outcome = await queue.get()
+                if outcome is None:
+                    break
+                slots.release()
+                pending.extend(outcome[0])
+                errors.extend(outcome[1])
+                if len(pending) + len(errors) >= write_size:
+                    await flush()
+            await flush()
+
+        if ids_to_process:
+            with self.db.scoped_pragmas(self._pragmas):
+                writer = asyncio.create_task(write())
+                if self.compute_is_io_bound:
+                    executor: Any = ThreadPoolExecutor(max_workers=self.max_workers)
+                else:
+                    executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                producers = asyncio.gather(
+                    *(
+                        compute(executor, ids_to_process[i : i + compute_size])
+                        for i in range(0, len(ids_to_process), compute_size)
+                    )
+                )
                 try:
-                    batch_result = future.result()
-                    results["processed"] += batch_result["processed"]
-                    results["successful"] += batch_result["successful"]
-                    results["failed"] += batch_result["failed"]
-                    results["errors"].extend(batch_result.get("errors", [])[:10])
-
-                    if progress_callback:
-                        progress_callback(results)
-                except Exception as exc:  # pragma: no cover - logging side-effect
-                    logger.error("Batch processing error: %s", exc)
-                    results["errors"].append(str(exc))
-
+                    # The writer only returns early by failing; it then stops draining the
+                    # queue, so never wait on the producers alone
+                    await asyncio.wait({producers, writer}, return_when=asyncio.FIRST_COMPLETED)
+                    if producers.done():
+                        queue.put_nowait(None)
+                    await writer
+                finally:
+                    producers.cancel()
+                    writer.cancel()
+                    await asyncio.gather(producers, writer, return_exceptions=True)
+                    executor.shutdown(wait=False, cancel_futures=True)
+            await asyncio.to_thread(self._evict_cached_outputs)
+
+        self._status_cache.pop(dataset, None)
         elapsed_time = time.time() - start_time
         results["status"] = "completed"
         results["elapsed_time"] = f"{elapsed_time:.2f}s"
@@ -142,47 +336,148 @@ class BatchProcessor:
 
         return results
 
-    def _process_batch(
+    def _load_work(
         self,
         dataset: str,
         function_name: str,
-        compute_func: Callable[[str, str, str, Dict[str, Any]], Any],
-        batch: List[Tuple[str, Dict[str, Any]]],
+        ids: Optional[List[str]],
+        force_recompute: bool,
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Load ``(id, raw_record)`` pairs to compute, skipping stored results unless forced."""
+        config = get_dataset_config(dataset)
+        key_field = config.key_field
+        table_name = config.table
+
+        # Get IDs to process
+        if ids is None:
+            ids_to_process = [
+                (row[0], self._build_raw_record(key_field, row))
+                for row in self.db.fetchall(self._sql("select_raw", table_name, key_field))
+            ]
+        else:
+            found: Dict[str, Dict[str, Any]] = {}
+            select_raw_in = self._sql("select_raw_in", table_name, key_field)
+            for chunk in chunked(ids):
+                query = in_clause(select_raw_in, len(chunk))
+                for row in self.db.fetchall(query, tuple(chunk)):
+                    found[row[0]] = self._build_raw_record(key_field, row)
+            ids_to_process = [(id_val, found[id_val]) for id_val in ids if id_val in found]
+
+        # Filter out already computed if not forcing recompute
+        if not force_recompute and ids_to_process:
+            ai_table = f"{dataset}_{function_name}"
+            existing: set = set()
+            if ids is None:
+                existing.update(
+                    row[0] for row in self.db.fetchall(self._sql("select_keys", ai_table, key_field))
+                )
+            else:
+                select_keys_in = self._sql("select_keys_in", ai_table, key_field)
+                for chunk in chunked([id_val for id_val, _ in ids_to_process]):
+                    query = in_clause(select_keys_in, len(chunk))
+                    existing.update(row[0] for row in self.db.fetchall(query, tuple(chunk)))
+            ids_to_process = [item for item in ids_to_process if item[0] not in existing]
+
+        return ids_to_process
+
+    def _reuse_cached_outputs(
+        self,
+        ai_table: str,
         key_field: str,
-        session_id: str,
-        user_id: str,
+        ids_to_process: List[Tuple[str, Dict[str, Any]]],
+        input_hashes: Dict[str, str],
+        function_id: str,
+    ) -> Tuple[List[Tuple[str, Dict[str, Any]]], Dict[str, Any]]:
+        """Store memoized outputs for inputs seen before; return the items still to compute."""
+        cached_payloads: Dict[str, Any] = {}
+        select_memo_in = self._sql("select_memo_in", COMPUTE_CACHE_TABLE)
+        for chunk in chunked(list(set(input_hashes.values()))):
+            query = in_clause(select_memo_in, len(chunk))
+            for input_hash, payload in self.db.fetchall(query, tuple(chunk)):
+                cached_payloads[input_hash] = payload
+
+        reused = [
+            (id_val, self.db.decode_payload(cached_payloads[input_hashes[id_val]]))
+            for id_val, _ in ids_to_process
+            if input_hashes[id_val] in cached_payloads
+        ]
+        remaining = [item for item in ids_to_process if input_hashes[item[0]] not in cached_payloads]
+        # Rewriting the memo rows refreshes them, so eviction drops the least recently used
+        return remaining, self._write_batch(ai_table, key_field, reused, [], input_hashes, function_id)
+
+    def _evict_cached_outputs(self) -> None:
+        """Delete the oldest memo rows beyond ``COMPUTE_CACHE_MAX_ROWS``."""
+        excess = self.db.fetchone(self._sql("count_memo", COMPUTE_CACHE_TABLE))[0] - COMPUTE_CACHE_MAX_ROWS
+        if excess > 0:
+            self.db.execute(self._sql("evict_memo", COMPUTE_CACHE_TABLE), (excess,))
+
+    def _sql(self, kind: str, table: str, key_field: str = "") -> str:
+        """Return the rendered statement of ``kind`` for a table, formatting it only once."""
+        cache_key = (kind, table, key_field)
+        sql = self._sql_cache.get(cache_key)
+        if sql is None:
+            sql = self._SQL_TEMPLATES[kind].format(table=table, key_field=key_field)
+            self._sql_cache[cache_key] = sql
+        return sql
+
+    @staticmethod
+    def _build_raw_record(key_field: str, row: Tuple[Any, ...]) -> Dict[str, Any]:
+        """Build a compute-function record from a ``(key, raw_data, title, ...)`` row."""
+        if row[1]:
+            return json_loads(row[1])
+        return {
+            key_field: row[0],
+            "title": row[2],
+            "category": row[3],
+            "risk_theme": row[4],
+            "risk_subtheme": row[5],
+        }
+
+    def _write_batch(
+        self,
+        ai_table: str,
+        key_field: str,
+        computed: List[Tuple[str, Any]],
+        errors: List[str],
+        input_hashes: Optional[Dict[str, str]] = None,
+        function_id: str = "",
     ) -> Dict[str, Any]:
-        """Process a single batch of items."""
+        """Store a computed batch in one transaction and summarize the outcome.
+
+        When ``input_hashes`` maps IDs to input digests, the outputs are also memoized in
+        the compute cache within the same transaction, recorded against ``function_id``.
+        """
         batch_results: Dict[str, Any] = {
-            "processed": 0,
+            "processed": len(computed) + len(errors),
             "successful": 0,
-            "failed": 0,
-            "errors": [],
+            "failed": len(errors),
+            "errors": list(errors),
         }
 
-        ai_table = f"{dataset}_{function_name}"
-
-        for id_val, raw_record in batch:
-            try:
-                result = compute_func(id_val, session_id, user_id, raw_record)
-                if inspect.isawaitable(result):
-                    result = asyncio.run(result)
-                query = f"""
-                    INSERT OR REPLACE INTO {ai_table}
-                    ({key_field}, payload, created_at)
-                    VALUES (?, ?, ?)
-                """
-                self.db.execute(
-                    query,
-                    (id_val, json.dumps(result), datetime.utcnow().isoformat() + "Z"),
-                )
-                batch_results["successful"] += 1
-            except Exception as exc:  # pragma: no cover - logging side-effect
-                logger.error("Error processing %s: %s", id_val, exc)
-                batch_results["failed"] += 1
-                batch_results["errors"].append(f"{id_val}: {exc}")
-            finally:
-                batch_results["processed"] += 1
+        if not computed:
+            return batch_results
+
+        try:
+            # One transaction per batch so SQLite commits once instead of per row
+            created_at = utc_now_iso()
+            encode = self.db.encode_payload
+            rows = [(id_val, encode(result), created_at) for id_val, result in computed]
+            with self.db.transaction():
+                self.db.executemany(self._sql("upsert_result", ai_table, key_field), rows)
+                if input_hashes:
+                    self.db.executemany(
+                        self._sql("upsert_memo", COMPUTE_CACHE_TABLE),
+                        [
+                            (input_hashes[id_val], function_id, ai_table, id_val, payload, ts)
+                            for id_val, payload, ts in rows
+                        ],
+                    )
+            self.db.invalidate(ai_table, [id_val for id_val, _ in computed])
+            batch_results["successful"] += len(computed)
+        except Exception as exc:  # pragma: no cover - logging side-effect
+            logger.error("Error writing batch to %s: %s", ai_table, exc)
+            batch_results["failed"] += len(computed)
+            batch_results["errors"].append(f"Batch write error: {exc}")
 
         return batch_results
 
@@ -195,6 +490,7 @@ class BatchProcessor:
         """Batch delete items from a dataset."""
         config = get_dataset_config(dataset)
         key_field = config.key_field
+        ids = _unique_ids(ids, "batch_delete")
 
         results = {
             "deleted": 0,
@@ -202,80 +498,193 @@ class BatchProcessor:
             "errors": [],
         }
 
-        tables_to_clean = [config.table]
+        # Result tables reference the raw table, so clear them before it
+        tables_to_clean = [f"{dataset}_{func}" for func in config.ai_functions] if cascade else []
+        tables_to_clean.append(config.table)
 
-        if cascade:
-            tables_to_clean.extend(f"{dataset}_{func}" for func in config.ai_functions)
-
-        for id_val in ids:
-            try:
-                for table in tables_to_clean:
-                    query = f"DELETE FROM {table} WHERE {key_field} = ?"
-                    self.db.execute(query, (id_val,))
-                results["deleted"] += 1
-            except Exception as exc:  # pragma: no cover - logging side-effect
-                logger.error("Error deleting %s: %s", id_val, exc)
-                results["failed"] += 1
-                results["errors"].append(f"{id_val}: {exc}")
+        with self.db.transaction():
+            for chunk in chunked(ids):
+                try:
+                    # Nested savepoint: a failed chunk leaves no partial cascade behind
+                    with self.db.transaction():
+                        for table in tables_to_clean:
+                            query = in_clause(self._sql("delete_in", table, key_field), len(chunk))
+                            self.db.execute(query, tuple(chunk))
+                            if table != config.table:
+                                # Otherwise a later batch compute would restore the deleted outputs
+                                query = in_clause(self._sql("delete_memo_in", COMPUTE_CACHE_TABLE), len(chunk))
+                                self.db.execute(query, (table, *chunk))
+                    results["deleted"] += len(chunk)
+                except Exception as exc:  # pragma: no cover - logging side-effect
+                    logger.error("Error deleting batch from %s: %s", dataset, exc)
+                    results["failed"] += len(chunk)
+                    results["errors"].append(f"Batch delete error: {exc}")
 
+        for table in tables_to_clean:
+            self.db.invalidate(table, ids)
+        self._status_cache.pop(dataset, None)
         return results
 
-    def batch_export(
+    def _iter_export_pages(
+        self,
+        table_name: str,
+        key_field: str,
+        ids: Optional[List[str]] = None,
+    ) -> Iterator[List[Tuple[Any, ...]]]:
+        """Yield export rows a page at a time: by requested ID chunk, or by key order."""
+        if ids:
+            select_in = self._sql("select_export_in", table_name, key_field)
+            for chunk in chunked(ids):
+                rows = self.db.fetchall(in_clause(select_in, len(chunk)), tuple(chunk))
+                if rows:
+                    yield rows
+            return
+
+        # Keyset pagination keeps each query cheap and memory bounded by one page
+        rows = self.db.fetchall(self._sql("select_export_first", table_name, key_field), (SQL_PARAM_CHUNK,))
+        select_after = self._sql("select_export_after", table_name, key_field)
+        while rows:
+            yield rows
+            if len(rows) < SQL_PARAM_CHUNK:
+                return
+            rows = self.db.fetchall(select_after, (rows[-1][0], SQL_PARAM_CHUNK))
+
+    def _iter_export(
         self,
         dataset: str,
-        output_format: str = "json",
         include_ai_results: bool = True,
-        ids: Optional[List[str]] = None
-    ) -> Dict[str, Any]:
-        """Batch export dataset with optional AI results."""
+        ids: Optional[List[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield export items one at a time, with AI results attached when requested.
+
+        Rows are read one page at a time and each page's AI results come from one
+        ``IN (...)`` query per function, so memory is bounded by the page, not the dataset.
+        """
         config = get_dataset_config(dataset)
         key_field = config.key_field
-        table_name = config.table
+        ai_functions = config.ai_functions if include_ai_results else []
+
+        for rows in self._iter_export_pages(config.table, key_field, ids):
+            keys = tuple(row[0] for row in rows)
+            ai_by_func: Dict[str, Dict[str, Tuple[Any, Any]]] = {}
+            for func in ai_functions:
+                select_in = self._sql("select_results_in", f"{dataset}_{func}", key_field)
+                ai_by_func[func] = {
+                    key: (payload, created_at)
+                    for key, payload, created_at in self.db.fetchall(in_clause(select_in, len(keys)), keys)
+                }
 
-        if ids:
-            placeholders = ",".join("?" for _ in ids)
-            query = f"""
-                SELECT {key_field}, title, category, risk_theme, risk_subtheme, raw_data
-                FROM {table_name}
-                WHERE {key_field} IN ({placeholders})
-            """
-            rows = self.db.fetchall(query, tuple(ids))
-        else:
-            query = f"""
-                SELECT {key_field}, title, category, risk_theme, risk_subtheme, raw_data
-                FROM {table_name}
-            """
-            rows = self.db.fetchall(query)
-
-        export_data: List[Dict[str, Any]] = []
-
-        for row in rows:
-            item: Dict[str, Any] = {
-                key_field: row[0],
-                "title": row[1],
-                "category": row[2],
-                "risk_theme": row[3],
-                "risk_subtheme": row[4],
-                "raw_data": json.loads(row[5]) if row[5] else {},
-            }
+            for row in rows:
+                item: Dict[str, Any] = {
+                    key_field: row[0],
+                    "title": row[1],
+                    "category": row[2],
+                    "risk_theme": row[3],
+                    "risk_subtheme": row[4],
+                    "raw_data": json_loads(row[5]) if row[5] else {},
+                }
+
+                if include_ai_results:
+                    item["ai_results"] = {}
+                    for func, found in ai_by_func.items():
+                        ai_result = found.get(row[0])
+                        if ai_result:
+                            item["ai_results"][func] = {
+                                "payload": self.db.decode_payload(ai_result[0]),
+                                "created_at": ai_result[1],
+                            }
+
+                yield item
+
+    @staticmethod
+    def _flatten_export_item(item: Dict[str, Any], ai_functions: List[str]) -> Dict[str, Any]:
+        """Flatten an export item into a CSV row: drop nested data, flag present AI results."""
+        row = {k: v for k, v in item.items() if k not in ("ai_results", "raw_data")}
+        if "ai_results" in item:
+            ai_results = item["ai_results"]
+            for func in ai_functions:
+                row[f"{func}_present"] = func in ai_results
+        return row
+
+    def _export_chunks(
+        self,
+        dataset: str,
+        output_format: str,
+        include_ai_results: bool,
+        ids: Optional[List[str]],
+    ) -> Iterator[Tuple[str, int]]:
+        """Yield ``(text, item_count)`` chunks of a CSV or JSON Lines export."""
+        config = get_dataset_config(dataset)
+        buffer = io.StringIO()
+        count = 0
 
+        if output_format == "csv":
+            fieldnames = [config.key_field, "title", "category", "risk_theme", "risk_subtheme"]
             if include_ai_results:
-                item["ai_results"] = {}
-                for func in config.ai_functions:
-                    table = f"{dataset}_{func}"
-                    ai_query = f"""
-                        SELECT payload, created_at
-                        FROM {table}
-                        WHERE {key_field} = ?
-                    """
-                    ai_result = self.db.fetchone(ai_query, (row[0],))
-                    if ai_result:
-                        item["ai_results"][func] = {
-                            "payload": json.loads(ai_result[0]),
-                            "created_at": ai_result[1],
-                        }
-
-            export_data.append(item)
+                fieldnames.extend(f"{func}_present" for func in config.ai_functions)
+            writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+            writer.writeheader()
+
+            def write_item(item: Dict[str, Any]) -> None:
+                writer.writerow(self._flatten_export_item(item, config.ai_functions))
+        else:
+
+            def write_item(item: Dict[str, Any]) -> None:
+                buffer.write(json_dumps(item))
+                buffer.write("\n")
+
+        for item in self._iter_export(dataset, include_ai_results, ids):
+            write_item(item)
+            count += 1
+            if buffer.tell() >= EXPORT_CHUNK_CHARS:
+                yield buffer.getvalue(), count
+                buffer.seek(0)
+                buffer.truncate()
+                count = 0
+        yield buffer.getvalue(), count
+
+    def stream_export(
+        self,
+        dataset: str,
+        output_format: str = "jsonl",
+        include_ai_results: bool = True,
+        ids: Optional[List[str]] = None,
+    ) -> Iterator[str]:
+        """Return an iterator of CSV or JSON Lines text chunks for an export.
+
+        Nothing is materialized beyond one page of rows and one text chunk, so the result
+        can feed a ``StreamingResponse`` or ``TextIO.writelines`` directly. CSV rows are
+        flattened the same way as ``batch_export``'s CSV output. Without ``ids``, rows are
+        exported in key order.
+        """
+        if output_format not in ("csv", "jsonl"):
+            raise ValueError(f"Unsupported stream format: {output_format}")
+        get_dataset_config(dataset)  # Fail on an unknown dataset before the first chunk
+        return (text for text, _ in self._export_chunks(dataset, output_format, include_ai_results, ids))
+
+    def batch_export(
+        self,
+        dataset: str,
+        output_format: str = "json",
+        include_ai_results: bool = True,
+        ids: Optional[List[str]] = None,
+        out: Optional[TextIO] = None,
+    ) -> Dict[str, Any]:
+        """Batch export dataset with optional AI results.
+
+        With ``out``, the export is streamed to it through ``stream_export`` (``"json"`` is
+        written as JSON Lines) and the result reports the count instead of carrying ``data``.
+        """
+        config = get_dataset_config(dataset)
+        if out is not None:
+            stream_format = "csv" if output_format == "csv" else "jsonl"
+            count = 0
+            for text, items in self._export_chunks(dataset, stream_format, include_ai_results, ids):
+                out.write(text)
+                count += items
+            return {"status": "success", "dataset": dataset, "count": count, "format": stream_format}
+
+        export_data = list(self._iter_export(dataset, include_ai_results, ids))
 
         results: Dict[str, Any] = {
             "status": "success",
@@ -286,51 +695,58 @@ class BatchProcessor:
         }
 
         if output_format == "csv":
-            import pandas as pd  # Local import to avoid dependency at import time
-
-            df = pd.DataFrame(export_data)
+            # Same flattening as stream_export's CSV rows; no DataFrame type inference needed
+            ai_functions = config.ai_functions
+            results["data"] = [self._flatten_export_item(item, ai_functions) for item in export_data]
 
-            if include_ai_results and "ai_results" in df.columns:
-                for func in config.ai_functions:
-                    df[f"{func}_present"] = df["ai_results"].apply(
-                        lambda x, fn=func: fn in x if isinstance(x, dict) else False
-                    )
-                df = df.drop("ai_results", axis=1)
+        return results
 
-            if "raw_data" in df.columns:
-                df = df.drop("raw_data", axis=1)
+    def _count_rows(self, tables: List[str]) -> Dict[str, int]:
+        """Count rows in several tables with one UNION ALL query."""
+        query = " UNION ALL ".join(f"SELECT '{table}', COUNT(*) FROM {table}" for table in tables)
+        try:
+            return {table: int(count) for table, count in self.db.fetchall(query)}
+        except Exception:  # pragma: no cover - defensive
+            # A missing table fails the whole UNION; count individually so the rest still report
+            counts: Dict[str, int] = {}
+            for table in tables:
+                try:
+                    counts[table] = self.db.fetchone(f"SELECT COUNT(*) FROM {table}")[0]
+                except Exception:
+                    counts[table] = 0
+            return counts
 
-            results["data"] = df.to_dict("records")
+    def get_batch_status(self, dataset: str) -> Dict[str, Any]:
+        """Get batch processing status for a dataset.
 
-        return results
+        Results are reused for ``_status_ttl`` seconds so a polling dashboard does not
+        rescan every table; computing or deleting items for the dataset drops the entry.
+        """
+        cached = self._status_cache.get(dataset)
+        if cached is not None and time.monotonic() - cached[0] < self._status_ttl:
+            return cached[1]
 
-    def get_batch_status(self, dataset: str) -> Dict[str, Any]:
-        """Get batch processing status for a dataset."""
         config = get_dataset_config(dataset)
         key_field = config.key_field
 
-        total_query = f"SELECT COUNT(*) FROM {config.table}"
-        total_row = self.db.fetchone(total_query)
-        total = total_row[0] if total_row else 0
+        tables = [config.table] + [f"{dataset}_{func}" for func in config.ai_functions]
+        counts = self._count_rows(tables)
+        total = counts.get(config.table, 0)
 
         ai_status: Dict[str, Dict[str, Any]] = {}
         for func in config.ai_functions:
-            table_name = f"{dataset}_{func}"
-            count_query = f"SELECT COUNT(*) FROM {table_name}"
-            try:
-                count = self.db.fetchone(count_query)[0]
-            except Exception:  # pragma: no cover - defensive
-                count = 0
-
+            count = counts.get(f"{dataset}_{func}", 0)
             ai_status[func] = {
                 "computed": count,
                 "pending": max(total - count, 0),
                 "percentage": f"{(count / total * 100):.1f}%" if total > 0 else "0%",
             }
 
-        return {
+        status = {
             "dataset": dataset,
             "key_field": key_field,
             "total_items": total,
             "ai_functions": ai_status,
         }
+        self._status_cache[dataset] = (time.monotonic(), status)
+        return status
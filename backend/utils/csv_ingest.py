@@ -1,41 +1,151 @@
 """CSV ingestion utilities for loading data into SQLite database."""
 import csv
-import json
 import os
 import logging
-from typing import Dict, List, Any, Generator, Tuple, Optional
-from datetime import datetime
+from typing import Callable, Dict, List, Any, Generator, TextIO, Tuple, Optional
+from functools import lru_cache
+from itertools import chain, islice
+from operator import itemgetter
 
-from db import get_db
+from db import BULK_LOAD_PRAGMAS, SQL_PARAM_CHUNK, chunked, get_db, json_dumps, utc_now_iso
 from dataset_config import DATASET_CONFIG, DatasetConfig, get_dataset_config
 
+try:
+    import pyarrow as pa  # type: ignore[import]
+    import pyarrow.compute as pc  # type: ignore[import]
+    from pyarrow import csv as pa_csv  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional speedup
+    pa = None
+
 logger = logging.getLogger(__name__)
 
+# Bytes per native CSV block when pyarrow is available
+ARROW_BLOCK_SIZE = 8 << 20
+
+# Read buffer for CSV files; larger reads mean fewer syscalls on big files
+CSV_READ_BUFFER = 1 << 20
+
+# Columns per ingested row, and rows packed into one multi-row SQLite INSERT
+_INSERT_COLUMNS = 7
+_ROWS_PER_INSERT = SQL_PARAM_CHUNK // _INSERT_COLUMNS
+
+
+def _advise_sequential(fd: int) -> None:
+    """Ask the kernel to read the whole file ahead for a single sequential pass."""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:  # pragma: no cover - advisory only
+        pass
+
+
+def _prefetch_csv(filepath: str) -> None:
+    """Start page-cache readahead for a CSV that will be read later; no-op if unavailable."""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        _advise_sequential(fd)
+    finally:
+        os.close(fd)
+
+
+def _open_csv(filepath: str) -> TextIO:
+    """Open a CSV for one sequential pass, with a large buffer and readahead hints."""
+    csvfile = open(filepath, 'r', encoding='utf-8-sig', newline='', buffering=CSV_READ_BUFFER)
+    _advise_sequential(csvfile.fileno())
+    return csvfile
+
+
+@lru_cache(maxsize=4096)
+def _split_theme_parts(value: str, delimiter: str) -> Tuple[str, str]:
+    """Split a delimited theme into primary and secondary parts, memoized across rows.
+
+    Theme strings repeat heavily within a dataset, so most rows are a cache hit.
+    """
+    parts = [part for part in map(str.strip, value.split(delimiter)) if part]
+    if not parts:
+        return "", ""
+    if len(parts) == 1:
+        return parts[0], ""
+    return parts[0], ", ".join(parts[1:])
+
+
+def _required_field_names(config: DatasetConfig) -> Tuple[str, ...]:
+    """Return the fields a normalized row must carry, in validation order."""
+    fields = [config.key_field, config.title_field, config.theme_field]
+    if config.category_field:
+        fields.append(config.category_field)
+    if config.subtheme_field:
+        fields.append(config.subtheme_field)
+    return tuple(fields)
+
+
+def _insert_columns_builder(
+    config: DatasetConfig,
+) -> Callable[[Dict[str, Any]], Tuple[Optional[Tuple[str, ...]], str]]:
+    """Return a function giving a normalized row's typed columns, or ``None`` and an error.
+
+    Columns are ``(key, title, category, risk_theme, risk_subtheme)``. Validation matches
+    ``validate_row``: key, title and category must be non-empty while themes may be blank.
+    The dataset's optional fields are resolved here once instead of on every row.
+    """
+    names = _required_field_names(config)
+    fetch = itemgetter(*names)
+    key_field, title_field, category_field = config.key_field, config.title_field, config.category_field
+    blank_allowed = (config.theme_field, config.subtheme_field)
+    category_index = 3 if category_field else None
+    subtheme_index = len(names) - 1 if config.subtheme_field else None
+
+    def build(row: Dict[str, Any]) -> Tuple[Optional[Tuple[str, ...]], str]:
+        try:
+            values = fetch(row)
+        except KeyError:
+            # Rare path: report the first failing field in validation order
+            for field in names:
+                if field not in row or (field not in blank_allowed and not row[field]):
+                    return None, f"Missing required field: {field}"
+
+        key_value, title_value, risk_theme = values[0], values[1], values[2]
+        category_value = values[category_index] if category_index else ''
+        if not key_value:
+            return None, f"Missing required field: {key_field}"
+        if not title_value:
+            return None, f"Missing required field: {title_field}"
+        if category_index and not category_value:
+            return None, f"Missing required field: {category_field}"
+
+        risk_subtheme = values[subtheme_index] if subtheme_index else ''
+        return (key_value, title_value, category_value, risk_theme, risk_subtheme), ""
+
+    return build
+
 
 class CSVIngester:
     """Handle CSV data ingestion into SQLite database."""
 
-    def __init__(self, csv_dir: str = "csv_data"):
-        """Initialize CSV ingester."""
+    def __init__(self, csv_dir: str = "csv_data", tuning: bool = True):
+        """Initialize CSV ingester.
+
+        ``tuning`` applies ``BULK_LOAD_PRAGMAS`` (including a 256MB ``cache_size=-262144``
+        page cache) to the shared SQLite connection while ``ingest_dataset``/``ingest_all``
+        run, restoring the configured values afterwards.
+        """
         self.csv_dir = csv_dir
         self.db = get_db()
+        # INSERT statement text per (table, key_field, rows), rendered on first use
+        self._insert_sql: Dict[Tuple[str, str, int], str] = {}
+        self._pragmas: Dict[str, Any] = BULK_LOAD_PRAGMAS if tuning else {}
         self.dataset_configs = DATASET_CONFIG
 
     def _required_fields(self, config: DatasetConfig) -> List[str]:
         """Return required fields after normalization."""
-        fields = [
-            config.key_field,
-            config.title_field,
-            config.theme_field
-        ]
-
-        if config.category_field:
-            fields.append(config.category_field)
-
-        if config.subtheme_field:
-            fields.append(config.subtheme_field)
-
-        return fields
+        return list(_required_field_names(config))
 
     def _split_theme(self, value: str, delimiter: Optional[str]) -> Tuple[str, str]:
         """Split a combined risk theme string into primary and secondary parts."""
@@ -43,42 +153,45 @@ class CSVIngester:
             return "", ""
 
         if delimiter:
-            parts = [part.strip() for part in value.split(delimiter) if part.strip()]
-            if not parts:
-                return "", ""
-            if len(parts) == 1:
-                return parts[0], ""
-            return parts[0], ", ".join(parts[1:])
+            return _split_theme_parts(value, delimiter)
 
         return value.strip(), ""
 
     def _prepare_row(self, row: Dict[str, Any], config: DatasetConfig) -> Dict[str, Any]:
         """Normalize and enrich a raw CSV row."""
-        normalized = {k: (v.strip() if isinstance(v, str) else v) for k, v in row.items()}
+        # Short rows from the stdlib reader carry None for their missing fields
+        normalized = {
+            k: (v.strip() if isinstance(v, str) else '' if v is None else v) for k, v in row.items()
+        }
+
+        category_field, theme_field, subtheme_field, delimiter = (
+            config.category_field, config.theme_field, config.subtheme_field, config.theme_delimiter
+        )
 
-        if config.category_field and config.category_field not in normalized:
-            normalized[config.category_field] = ''
+        if category_field and category_field not in normalized:
+            normalized[category_field] = ''
 
-        original_theme = normalized.get(config.theme_field, '') or ''
-        primary_theme, secondary_theme = self._split_theme(original_theme, config.theme_delimiter)
-        normalized[config.theme_field] = primary_theme
+        original_theme = normalized.get(theme_field, '') or ''
+        primary_theme, secondary_theme = self._split_theme(original_theme, delimiter)
+        normalized[theme_field] = primary_theme
 
-        if config.subtheme_field:
-            normalized[config.subtheme_field] = secondary_theme
+        if subtheme_field:
+            normalized[subtheme_field] = secondary_theme
 
-        if original_theme and original_theme != primary_theme and config.theme_delimiter:
-            normalized[f"{config.theme_field}_original"] = original_theme
+        if original_theme and original_theme != primary_theme and delimiter:
+            normalized[f"{theme_field}_original"] = original_theme
 
         return normalized
 
     def validate_row(self, row: Dict[str, Any], config: DatasetConfig) -> Tuple[bool, str]:
         """Validate a CSV row."""
         # Check required fields
-        for field in self._required_fields(config):
+        blank_allowed = (config.theme_field, config.subtheme_field)
+        for field in _required_field_names(config):
             if field not in row:
                 return False, f"Missing required field: {field}"
 
-            if field in (config.theme_field, config.subtheme_field):
+            if field in blank_allowed:
                 # Allow empty risk theme/subtheme entries
                 continue
 
@@ -95,69 +208,155 @@ class CSVIngester:
         return True, ""
 
     def stream_csv(self, filepath: str) -> Generator[Dict[str, Any], None, None]:
-        """Stream CSV file row by row."""
+        """Stream CSV file row by row.
+
+        With pyarrow installed the file is tokenized natively in column batches;
+        otherwise ``csv.reader`` is used. Field names are always stripped; values
+        may not be until ``_prepare_row`` normalizes them.
+        """
         try:
-            with open(filepath, 'r', encoding='utf-8-sig') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    # Clean up field names (remove BOM, whitespace)
-                    clean_row = {k.strip(): v.strip() if v else '' for k, v in row.items()}
-                    yield clean_row
+            if pa is not None:
+                yield from self._stream_csv_arrow(filepath)
+            else:
+                yield from self._stream_csv_stdlib(filepath)
         except Exception as e:
             logger.error(f"Error reading CSV file {filepath}: {e}")
             raise
 
+    def _stream_csv_stdlib(self, filepath: str) -> Generator[Dict[str, Any], None, None]:
+        """Stream rows with the standard library CSV reader.
+
+        Rows come from ``csv.reader`` and are zipped onto the header, which avoids
+        ``DictReader``'s per-row Python overhead. Short rows are padded with empty values
+        as ``DictReader`` would; fields beyond the header are dropped.
+        """
+        with _open_csv(filepath) as csvfile:
+            reader = csv.reader(csvfile)
+            header = next(reader, None)
+            if not header:
+                return
+
+            # Clean up field names once (utf-8-sig already drops the BOM); values are
+            # stripped by _prepare_row
+            names = [name.strip() for name in header]
+            width = len(names)
+            padding = [''] * width
+            for values in reader:
+                if len(values) < width:
+                    if not values:
+                        continue  # blank line
+                    values += padding[len(values):]
+                yield dict(zip(names, values))
+
+    def _stream_csv_arrow(self, filepath: str) -> Generator[Dict[str, Any], None, None]:
+        """Stream rows from pyarrow record batches, trimming whole columns at once.
+
+        pyarrow cannot pad short rows or truncate long ones in place, so the first
+        malformed row hands the rest of the file to ``_stream_csv_stdlib``, resuming
+        after the rows already yielded. Output therefore matches the stdlib reader
+        row for row, in file order.
+        """
+        with open(filepath, 'r', encoding='utf-8-sig', newline='') as csvfile:
+            header = next(csv.reader(csvfile), None)
+        if not header:
+            return
+
+        names = [name.strip() for name in header]
+        malformed = False
+
+        def flag_malformed(row: Any) -> str:
+            nonlocal malformed
+            malformed = True
+            return 'skip'
+
+        emitted = 0
+        try:
+            reader = pa_csv.open_csv(
+                filepath,
+                read_options=pa_csv.ReadOptions(block_size=ARROW_BLOCK_SIZE),
+                parse_options=pa_csv.ParseOptions(
+                    newlines_in_values=True, invalid_row_handler=flag_malformed
+                ),
+                convert_options=pa_csv.ConvertOptions(
+                    column_types={name: pa.string() for name in header},
+                    strings_can_be_null=False,
+                ),
+            )
+            for batch in reader:
+                # A batch is parsed before it is returned, so every row yielded so far
+                # precedes the first malformed row
+                if malformed:
+                    break
+                columns = [pc.utf8_trim_whitespace(column).to_pylist() for column in batch.columns]
+                for values in zip(*columns):
+                    yield dict(zip(names, values))
+                emitted += batch.num_rows
+        except pa.ArrowInvalid as exc:
+            logger.info(f"pyarrow could not parse {filepath} ({exc})")
+            malformed = True
+
+        if malformed:
+            logger.info(f"Malformed rows in {filepath}; reading on with the csv module from row {emitted}")
+            yield from islice(self._stream_csv_stdlib(filepath), emitted, None)
+
     def process_batch(self, rows: List[Dict[str, Any]], config: DatasetConfig) -> Tuple[int, int, List[str]]:
         """Process a batch of rows for insertion."""
-        table = config.table
+        batch_data, failed, errors = self._build_batch(rows, config)
+        successful, insert_failed, insert_errors = self._insert_batch(batch_data, config)
+        return successful, failed + insert_failed, errors + insert_errors
+
+    def _build_batch(
+        self, rows: List[Dict[str, Any]], config: DatasetConfig
+    ) -> Tuple[List[Tuple[Any, ...]], int, List[str]]:
+        """Normalize and validate rows into insert tuples; no database access."""
         key_field = config.key_field
-        successful = 0
         failed = 0
         errors = []
 
-        # Prepare batch data
-        batch_data = []
+        # Prepare batch data; rows in a batch share one ingestion timestamp
+        batch_data: List[Tuple[Any, ...]] = []
+        append = batch_data.append
+        created_at = utc_now_iso()
+        build_columns = _insert_columns_builder(config)
+        prepare_row, dumps = self._prepare_row, json_dumps
 
         for row in rows:
-            normalized_row = self._prepare_row(row, config)
+            normalized_row = prepare_row(row, config)
 
-            is_valid, error_msg = self.validate_row(normalized_row, config)
-            if not is_valid:
+            columns, error_msg = build_columns(normalized_row)
+            if columns is None:
                 failed += 1
                 errors.append(f"{normalized_row.get(key_field, 'unknown')}: {error_msg}")
                 continue
 
-            key_value = normalized_row[key_field]
-            title_value = normalized_row.get(config.title_field, '')
-            category_value = normalized_row.get(config.category_field, '') if config.category_field else ''
-            risk_theme = normalized_row.get(config.theme_field, '')
-            risk_subtheme = normalized_row.get(config.subtheme_field, '') if config.subtheme_field else ''
-
-            # Store entire row as JSON for raw_data column
-            raw_data = json.dumps(normalized_row)
-
-            batch_data.append((
-                key_value,
-                title_value,
-                category_value,
-                risk_theme,
-                risk_subtheme,
-                raw_data,
-                datetime.utcnow().isoformat() + 'Z'
-            ))
+            # Store entire row as JSON for raw_data column; only valid rows are encoded
+            append((*columns, dumps(normalized_row), created_at))
+
+        return batch_data, failed, errors
+
+    def _insert_batch(
+        self, batch_data: List[Tuple[Any, ...]], config: DatasetConfig
+    ) -> Tuple[int, int, List[str]]:
+        """Insert prepared tuples, returning ``(successful, failed, errors)``."""
+        successful = 0
+        failed = 0
+        errors = []
 
         # Insert batch into database
         if batch_data:
             try:
-                # Use INSERT OR IGNORE to skip duplicates
-                insert_query = f'''
-                    INSERT OR IGNORE INTO {table}
-                    ({key_field}, title, category, risk_theme, risk_subtheme, raw_data, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                '''
-                self.db.executemany(insert_query, batch_data)
-
-                # APSW is in autocommit mode by default, no commit needed
+                # One transaction per batch so SQLite commits once instead of per row
+                with self.db.transaction():
+                    if self.db.backend == "postgres":
+                        # The PostgreSQL adapter rewrites single-row INSERT OR IGNORE only
+                        self.db.executemany(self._insert_statement(config), batch_data)
+                    else:
+                        for chunk in chunked(batch_data, _ROWS_PER_INSERT):
+                            self.db.execute(
+                                self._insert_statement(config, len(chunk)),
+                                tuple(chain.from_iterable(chunk)),
+                            )
+
                 successful = len(batch_data)
             except Exception as e:
                 logger.error(f"Error inserting batch: {e}")
@@ -166,6 +365,21 @@ class CSVIngester:
 
         return successful, failed, errors
 
+    def _insert_statement(self, config: DatasetConfig, rows: int = 1) -> str:
+        """Return the dataset's insert statement for ``rows`` VALUES tuples, rendered once per size."""
+        cache_key = (config.table, config.key_field, rows)
+        sql = self._insert_sql.get(cache_key)
+        if sql is None:
+            # Use INSERT OR IGNORE to skip duplicates
+            values = ", ".join(["(" + ", ".join("?" * _INSERT_COLUMNS) + ")"] * rows)
+            sql = (
+                f"INSERT OR IGNORE INTO {config.table} "
+                f"({config.key_field}, title, category, risk_theme, risk_subtheme, raw_data, created_at) "
+                f"VALUES {values}"
+            )
+            self._insert_sql[cache_key] = sql
+        return sql
+
     def ingest_dataset(self, dataset_name: str, batch_size: int = 1000) -> Dict[str, Any]:
         """Ingest a single dataset from CSV."""
         config = get_dataset_config(dataset_name)
@@ -181,23 +395,40 @@ class CSVIngester:
         all_errors = []
         batch = []
 
-        # Process CSV in batches
-        for row in self.stream_csv(filepath):
-            batch.append(row)
-
-            if len(batch) >= batch_size:
-                successful, failed, errors = self.process_batch(batch, config)
-                total_successful += successful
-                total_failed += failed
-                all_errors.extend(errors)
-                batch = []
-
-        # Process remaining batch
-        if batch:
-            successful, failed, errors = self.process_batch(batch, config)
+        # Keys already stored or inserted from earlier batches. INSERT OR IGNORE would
+        # drop such rows, so they are skipped before binding and counted as it counted them.
+        seen = {row[0] for row in self.db.fetchall(f"SELECT {config.key_field} FROM {config.table}")}
+
+        def write(rows: List[Dict[str, Any]]) -> None:
+            nonlocal total_successful, total_failed
+            batch_data, failed, errors = self._build_batch(rows, config)
+            fresh: Dict[Any, Tuple[Any, ...]] = {}
+            for values in batch_data:
+                if values[0] not in seen:
+                    fresh.setdefault(values[0], values)
+            successful, insert_failed, insert_errors = self._insert_batch(list(fresh.values()), config)
+            if not insert_failed:
+                seen.update(fresh)
+                # Lets the resolver drop negative-cache entries for keys that now exist
+                self.db.invalidate(config.table, list(fresh))
+                successful += len(batch_data) - len(fresh)
             total_successful += successful
-            total_failed += failed
+            total_failed += failed + insert_failed
             all_errors.extend(errors)
+            all_errors.extend(insert_errors)
+
+        with self.db.scoped_pragmas(self._pragmas):
+            # Process CSV in batches
+            for row in self.stream_csv(filepath):
+                batch.append(row)
+
+                if len(batch) >= batch_size:
+                    write(batch)
+                    batch = []
+
+            # Process remaining batch
+            if batch:
+                write(batch)
 
         result = {
             'dataset': dataset_name,
@@ -214,18 +445,24 @@ class CSVIngester:
         """Ingest all datasets from CSV files."""
         results = {}
 
-        for dataset_name in self.dataset_configs:
-            try:
-                result = self.ingest_dataset(dataset_name, batch_size)
-                results[dataset_name] = result
-            except Exception as e:
-                logger.error(f"Error ingesting {dataset_name}: {e}")
-                results[dataset_name] = {
-                    'dataset': dataset_name,
-                    'error': str(e),
-                    'successful': 0,
-                    'failed': 0
-                }
+        # Let the kernel read later files in while earlier ones are parsed and written
+        for config in self.dataset_configs.values():
+            _prefetch_csv(os.path.join(self.csv_dir, config.csv_filename))
+
+        # One pragma scope for the whole run instead of one per dataset
+        with self.db.scoped_pragmas(self._pragmas):
+            for dataset_name in self.dataset_configs:
+                try:
+                    result = self.ingest_dataset(dataset_name, batch_size)
+                    results[dataset_name] = result
+                except Exception as e:
+                    logger.error(f"Error ingesting {dataset_name}: {e}")
+                    results[dataset_name] = {
+                        'dataset': dataset_name,
+                        'error': str(e),
+                        'successful': 0,
+                        'failed': 0
+                    }
 
         return results
 